@@ -1,650 +1,1729 @@
 # -*- coding: utf-8 -*-
-import sys
-import io
-import argparse
+"""
+호텔 매출 비교 프로그램
+- 전체고객 목록(매출_검토_결과.xlsx)과 아고다/부킹닷컴/익스피디아 명세서(ota-adjustment)를 비교
+- 일치: 노란색, 명세서에 없음: 파란색, 금액 불일치: 빨간 글씨 + 비교로그 시트 기록
 
-# Windows 콘솔 인코딩 문제 해결
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-
-# 명령행 인자 파싱
-parser = argparse.ArgumentParser(description='호텔 매출 비교 프로그램')
-parser.add_argument('--download-expedia', action='store_true', help='Expedia 명세서 자동 다운로드 실행')
-parser.add_argument('--expedia-start-date', help='Expedia 다운로드 시작 날짜 (YYYY-MM-DD)')
-parser.add_argument('--expedia-end-date', help='Expedia 다운로드 종료 날짜 (YYYY-MM-DD)')
-args = parser.parse_args()
-
-# Expedia 다운로드 옵션 처리
-if args.download_expedia:
-    print("\n" + "="*80)
-    print("Expedia 명세서 다운로드 옵션 활성화")
-    print("="*80)
-    try:
-        from expedia_downloader import ExpediaDownloader
-        
-        downloader = ExpediaDownloader(base_dir=os.path.dirname(os.path.abspath(__file__)))
-        count = downloader.run(
-            start_date=args.expedia_start_date,
-            end_date=args.expedia_end_date
-        )
-        
-        print(f"\n[결과] {count}개 Expedia 명세서 다운로드 완료\n")
-    except Exception as e:
-        print(f"\n[ERROR] Expedia 다운로드 실패: {e}\n")
-        import traceback
-        traceback.print_exc()
-
-# ...기존 코드...
-
-# 파일 맨 아래에 print_result_rows 정의 및 호출
-
-# ...기존 코드 맨 아래에 추가...
-def write_ratio_to_result_log(ratio, row_idx):
-    from openpyxl import load_workbook
-    result_path = os.path.join(dir_base, '매출_검토_결과.xlsx')
-    wb = load_workbook(result_path)
-    if '비교로그' not in wb.sheetnames:
-        print('[비교로그] 시트가 없습니다.')
-        return
-    ws = wb['비교로그']
-    # row_idx는 1부터 시작(헤더 포함), G열(7번째 열)에 기록
-    ws.cell(row=row_idx, column=7).value = ratio
-    wb.save(result_path)
-    print(f"[진단-비교로그] {row_idx}행 G열에 비율 {ratio} 기록 완료")
-import re
+다른 코드에서 사용:
+    from compare_sales import reconcile
+    result = reconcile('매출_검토_결과.xlsx', 'ota-adjustment', output_path='매출_검토_결과.xlsx')
+    result.status_by_row()  # {엑셀 행번호: 상태}
 
-def normalize(val):
-    if val is None:
-        return ''
-    return re.sub(r'[^a-zA-Z0-9가-힣]', '', str(val)).replace('.0','').strip().lower()
-def print_peter_ludwig_log():
-    from openpyxl import load_workbook
-    result_path = os.path.join(dir_base, '매출_검토_결과.xlsx')
-    wb = load_workbook(result_path, data_only=True)
-    if '비교로그' not in wb.sheetnames:
-        print('[비교로그] 시트가 없습니다.')
-        return
-    ws = wb['비교로그']
-    # print('[비교로그] Peter Ludwig 관련 행:')
-    for row in ws.iter_rows(values_only=True):
-        if row and any('Peter Ludwig' in str(cell) for cell in row):
-            print(row)
+여러 달 일괄 비교 (명세서는 한 번만 읽고 달마다 별도 프로세스):
+    python compare_sales.py --batch                      # 전체고객 목록_*.xlsx 전체 → 매출검토결과/매출_검토_결과(N월).xlsx
+    python compare_sales.py --batch 전체고객 목록_202511.xlsx 전체고객 목록_202512.xlsx --workers 2
+"""
 
 import os
+import sys
+import io
+import re
+import time
+import bisect
+import hashlib
+import argparse
+from functools import partial
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
 from openpyxl.styles import PatternFill, Font
-from collections import defaultdict
-import re
+try:
+    from openpyxl.styles.cell_style import StyleArray  # 내부 모듈 (apply_row_styles 참고)
+except ImportError:
+    StyleArray = None
+from openpyxl.formatting.formatting import ConditionalFormattingList
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.utils import get_column_letter
+
+from statement_cache import StatementCache
+from match_state import MatchStateStore
+from line_assignment import amount_diffs, assign, balanced_subsets
+from name_matching import NameIndex, normalize  # noqa: F401 (normalize: 기존 compare_sales.normalize 호환)
+from statement_layouts import resolve_layout, header_fingerprint, registry_version
+from stage_profile import StageProfiler
+
+# 데이터만 읽을 때 쓰는 엑셀 엔진: python-calamine이 설치되어 있으면 calamine(빠름), 없으면 pandas 기본(openpyxl)
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_READ_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_READ_ENGINE = None
 
 # 파일 경로 설정
 dir_base = os.path.dirname(os.path.abspath(__file__))
-
 directory_ota = os.path.join(dir_base, 'ota-adjustment')
+DEFAULT_CACHE_DIR = os.path.join(dir_base, '.statement_cache')
 
-# 결과 엑셀 파일에서만 데이터 로드
+# 비교 결과 상태
+STATUS_MATCHED = 'matched'      # 일치 → 노란색
+STATUS_NOT_FOUND = 'not_found'  # 명세서에 없음 → 파란색
+STATUS_MISMATCH = 'mismatch'    # 금액 불일치 → 빨간 글씨 + 비교로그
+STATUS_SKIPPED = 'skipped'      # 금액 또는 명세서 데이터 없음 → 표시 없음
 
-# 결과파일이 없으면 전체고객 목록 파일을 복사해서 생성
-result_path = os.path.join(dir_base, '매출_검토_결과.xlsx')
-if not os.path.exists(result_path):
-    import glob
-    import shutil
-    all_list = sorted(glob.glob(os.path.join(dir_base, '전체고객 목록_*.xlsx')))
-    if not all_list:
-        raise FileNotFoundError('전체고객 목록_*.xlsx 파일이 없습니다. 결과파일을 생성할 수 없습니다.')
-    latest_all = all_list[-1]
-    shutil.copy(latest_all, result_path)
-df_all = pd.read_excel(result_path, sheet_name=0)
+# OTA별 금액 정책 - 모든 금액은 원 단위 int64로 정확히 비교
+# factor: 명세서 금액에 곱하는 배율 (결과는 np.rint = 짝수 반올림, 파이썬 round와 동일)
+# tolerance: 허용 오차(원) - 오차 이내 금액 중 가장 가까운 명세서 행과 매칭 (tolerance_join), strip: 숫자 변환 전에 제거할 문자 패턴
+AMOUNT_POLICY = {
+    '아고다': {'factor': 1.0, 'tolerance': 0, 'strip': r','},
+    '부킹닷컴': {'factor': 0.82, 'tolerance': 0, 'strip': r','},  # 부킹 수수료 18% 제외
+    '익스피디아': {'factor': 1.0, 'tolerance': 1000, 'strip': r'[^\d.\-]'},  # "KRW 538739" 형식 (환불은 "KRW -5000")
+}
 
-# 컬럼명 매핑 (자동 추출)
-def find_col(cols, keyword):
-    for c in cols:
-        if keyword in c:
-            return c
-    return None
+# 결과 엑셀 색상 방식
+STYLE_FILL = 'fill'  # 셀마다 배경/글씨 지정
+STYLE_CONDITIONAL = 'conditional'  # 숨김 상태 열 + 조건부 서식
+STATUS_COLUMN = '비교상태'  # 조건부 서식 모드의 숨김 상태 열 헤더
+
+# 비교로그 저장 위치
+LOG_SHEET = 'sheet'  # 결과 파일 안의 비교로그 시트
+LOG_SIDECAR = 'sidecar'  # 별도 _비교로그.xlsx (write-only 스트리밍, 거래처별 상세 시트 포함)
+
+# 명세서 표준 컬럼명 (파일마다 컬럼 위치가 달라도 합칠 때 맞춰짐)
+STATEMENT_KEY = 'key'  # 이름(아고다) 또는 예약번호(부킹/익스피디아)
+STATEMENT_AMOUNT = 'amount_'  # amount_0, amount_1, ... (양식의 금액 컬럼 순서)
+STATEMENT_DATE = 'date'
+# 키가 예약번호인 거래처 (다른 파일의 같은 키/금액/날짜 행 = 같은 행). 아고다는 고객명이라 같은 금액의 다른 예약일 수 있음
+RESERVATION_KEYED = {'부킹닷컴', '익스피디아'}
+
+# 전체고객 목록에서 읽는 컬럼 (find_col 키워드)
+CUSTOMER_COLUMNS = {'name': '고객', 'price1': '객실', 'price2': '합계', 'vendor': '거래처', 'ota_no': 'OTA'}
+
+LOG_HEADER = ['고객명', '전체매출 행번호', '전체매출 가격', '파일명', '행번호', '비교 가격', '원가격', '이름 유사도']
+DETAIL_HEADER = ['전체매출 행번호', '고객명', '전체매출 가격', '상태', '명세서 행', '이름 유사도']
+
+# 아고다 고객명 유사 매칭 기준 (0~1). 정확히 같은 이름이 없을 때 이 점수 이상인 Remittances 이름을 같은 고객으로 봄
+AGODA_NAME_THRESHOLD = 0.85
+
+# 아고다 부분합 매칭 제한: 이름 하나의 (남은 행 + Remittances 행) 최대 개수, 아고다 전체 시간 예산(초)
+AGODA_SUBSET_MAX_ITEMS = 20
+AGODA_SUBSET_TIME_BUDGET = 2.0
+
+# 색상 스타일 정의
+fill_yellow = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
+fill_blue = PatternFill(start_color='ADD8E6', end_color='ADD8E6', fill_type='solid')
+font_red = Font(color='FF0000')
+fill_none = PatternFill(fill_type=None)  # 배경색 초기화
+font_default = Font()  # 글씨 색상 초기화 (검정색)
 
-# OTA번호 컬럼이 있으면 항상 문자열로 변환(.0 제거)
-col_ota_no = find_col(df_all.columns, 'OTA')
-if col_ota_no:
-    df_all[col_ota_no] = df_all[col_ota_no].astype(str).str.replace('.0', '', regex=False).str.strip()
-
-# 아고다 파일 목록 (기존 Remittances 엑셀 + 새 아고다 CSV 모두 지원)
-agoda_xlsx_files = [f for f in os.listdir(directory_ota) if f.startswith('Remittances') and f.endswith('.xlsx')]
-agoda_csv_files = [f for f in os.listdir(directory_ota) if f.startswith('아고다_') and f.endswith('.csv')]
-
-# 아고다 매출 데이터 통합
-df_ota = pd.DataFrame()
-for file in agoda_xlsx_files:
-    path = os.path.join(directory_ota, file)
-    try:
-        temp_df = pd.read_excel(path)
-        df_ota = pd.concat([df_ota, temp_df], ignore_index=True)
-    except Exception as e:
-        print(f"[WARN] 아고다 엑셀 읽기 실패: {file} - {e}")
-for file in agoda_csv_files:
-    path = os.path.join(directory_ota, file)
-    try:
-        temp_df = pd.read_csv(path)
-        df_ota = pd.concat([df_ota, temp_df], ignore_index=True)
-    except Exception as e:
-        print(f"[WARN] 아고다 CSV 읽기 실패: {file} - {e}")
-
-# 부킹 CSV 파일 읽기
-booking_files = [f for f in os.listdir(directory_ota) if f.startswith('부킹') and f.endswith('.csv')]
-df_booking = pd.DataFrame()
-for file in booking_files:
-    path = os.path.join(directory_ota, file)
-    temp_df = pd.read_csv(path)
-    df_booking = pd.concat([df_booking, temp_df], ignore_index=True)
-
-# 부킹 데이터 구조: B열=예약번호, I열=가격
-if not df_booking.empty:
-    # 예약번호를 문자열로 변환 (FutureWarning 방지)
-    df_booking[df_booking.columns[1]] = df_booking.iloc[:, 1].astype(str).str.strip()
-    # 금액 컬럼 (I열 = 인덱스 8)
-    booking_price_col = df_booking.columns[8] if len(df_booking.columns) > 8 else None
-
-# 익스피디아 CSV 파일 읽기
-expedia_files = [f for f in os.listdir(directory_ota) if f.startswith('익스피디아') and f.endswith('.csv')]
-df_expedia = pd.DataFrame()
-for file in expedia_files:
-    path = os.path.join(directory_ota, file)
-    temp_df = pd.read_csv(path)
-    df_expedia = pd.concat([df_expedia, temp_df], ignore_index=True)
-
-# 익스피디아 데이터 구조: A열=예약번호, F열=처리금액
-if not df_expedia.empty:
-    # 예약번호를 문자열로 변환 (FutureWarning 방지)
-    df_expedia[df_expedia.columns[0]] = df_expedia.iloc[:, 0].astype(str).str.strip()
-    # 금액 컬럼 (F열 = 인덱스 5)
-    expedia_price_col = df_expedia.columns[5] if len(df_expedia.columns) > 5 else None
 
+@dataclass
+class RowResult:
+    """전체고객 목록 한 행의 비교 결과"""
+    ws_row: int  # 엑셀 행번호 (헤더 포함, 1부터)
+    ota: str  # 거래처 (아고다/부킹닷컴/익스피디아)
+    name: str  # 고객명
+    price: Optional[int]  # 비교에 사용한 금액 (합계 우선, 없으면 객실료)
+    status: str  # STATUS_*
+    statement_ids: List[str] = field(default_factory=list)  # 매칭된 명세서 행 ('파일명:행번호')
+    name_score: Optional[float] = None  # 아고다 고객명 유사도 (1.0=정규화 후 일치, 기준 미만이면 가장 비슷한 이름의 점수)
 
 
+@dataclass
+class ReconcileResult:
+    """reconcile() 결과"""
+    customer_list: str  # 비교한 전체고객 목록 경로
+    rows: List[RowResult]  # 아고다 → 부킹닷컴 → 익스피디아, 거래처 안에서는 엑셀 행 순서
+    log_entries: List[list]  # 비교로그 시트 행 (LOG_HEADER 순서, 거래처별 엑셀 행 순서)
+
+    def status_by_row(self) -> Dict[int, str]:
+        return {r.ws_row: r.status for r in self.rows}
+
+    def log_rows_containing(self, text) -> List[list]:
+        """비교로그 행 중 text가 들어간 행 (저장된 엑셀을 다시 읽지 않음)"""
+        return [entry for entry in self.log_entries if any(text in str(cell) for cell in entry)]
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """거래처별 상태 건수"""
+        counts = defaultdict(lambda: defaultdict(int))
+        for r in self.rows:
+            counts[r.ota][r.status] += 1
+        return {ota: dict(c) for ota, c in counts.items()}
+
+
+@dataclass
+class StatementSet:
+    """OTA 하나의 명세서 묶음 (여러 파일을 합친 DataFrame + 파일별 위치 + 조회 인덱스)"""
+    df: pd.DataFrame
+    file_map: list  # [(파일명, 시작행, 행수), ...] - 시작행은 합친 DataFrame 기준 위치
+    key_col: Optional[str] = None  # 이름(아고다) 또는 예약번호(부킹/익스피디아) 컬럼
+    price_cols: List[str] = field(default_factory=list)
+    rows_by_key: dict = field(default_factory=dict)  # 키 → 행 위치 배열
+    amounts: np.ndarray = None  # (행수, 금액 컬럼 수) int64 원 단위 (AMOUNT_POLICY 적용 후)
+    amount_valid: np.ndarray = None  # amounts와 같은 모양, 금액 변환 성공 여부
+    _amount_table: pd.DataFrame = field(default=None, repr=False)
+    _net: tuple = field(default=None, repr=False)
+
+    def set_amounts(self, policy):
+        """price_cols를 정책(배율/반올림)에 따라 원 단위 int64 배열로 변환"""
+        n = len(self.df)
+        self.amounts = np.zeros((n, len(self.price_cols)), dtype=np.int64)
+        self.amount_valid = np.zeros((n, len(self.price_cols)), dtype=bool)
+        for c, col in enumerate(self.price_cols):
+            self.amounts[:, c], self.amount_valid[:, c] = amounts_to_won(self.df[col], policy['factor'], policy['strip'])
+        self._amount_table = None
+        self._net = None
+
+    def drop_repeated_lines(self):
+        """
+        다른 파일에 똑같이 다시 나온 행(같은 키/금액/날짜)은 처음 나온 파일 것만 유효로 남김 (기간이 겹치는 명세서 재다운로드)
+
+        같은 파일 안의 같은 행은 그대로 둠. 날짜 컬럼이 없는 양식(추정 양식 등)은 같은 예약의 다른 달 행과
+        구분할 수 없으므로 아무것도 제외하지 않음. Returns: 제외한 행 수
+        """
+        if self.df.empty or self.key_col is None or STATEMENT_DATE not in self.df.columns:
+            return 0
+        frame = pd.DataFrame({'key': self.df[self.key_col].to_numpy()})
+        for c in range(self.amounts.shape[1]):
+            frame[f'amount_{c}'] = np.where(self.amount_valid[:, c], self.amounts[:, c], np.iinfo(np.int64).min)
+        frame['date'] = self.df[STATEMENT_DATE].to_numpy()
+        signature = list(frame.columns)
+        frame['file'] = np.repeat(np.arange(len(self.file_map)), [n for _, _, n in self.file_map])
+        first_file = frame.groupby(signature, sort=False, dropna=False)['file'].transform('min').to_numpy()
+        repeated = (frame['file'].to_numpy() != first_file) & self.amount_valid.any(axis=1)
+        self.amount_valid[repeated] = False
+        self._amount_table = None
+        self._net = None
+        return int(repeated.sum())
+
+    def net_by_key(self):
+        """
+        키(예약번호/이름)별 순액: 모든 파일의 유효 금액 합계 (취소/조정 등 음수 행 포함)
+
+        Returns:
+            (합계 DataFrame, 유효 여부 DataFrame) - 인덱스=키, 열=금액 컬럼 번호
+        """
+        if self._net is None:
+            keys = self.df[self.key_col].to_numpy() if self.key_col else np.array([], dtype=object)
+            sums = pd.DataFrame(np.where(self.amount_valid, self.amounts, 0)).groupby(keys, sort=False).sum()
+            counts = pd.DataFrame(self.amount_valid).groupby(keys, sort=False).sum()
+            self._net = (sums, counts > 0)
+        return self._net
+
+    def net_lookup(self, keys):
+        """
+        키 배열 → (순액 (키 수, 금액 컬럼 수), 유효 여부, 유효 행 수) - 명세서에 없는 키는 유효 아님
+        """
+        sums, ok = self.net_by_key()
+        idx = sums.index.get_indexer(pd.Index(np.asarray(keys, dtype=object))) if len(sums) else np.full(len(keys), -1)
+        found = idx >= 0
+        n_cols = self.amounts.shape[1]
+        net = np.zeros((len(keys), n_cols), dtype=np.int64)
+        net_ok = np.zeros((len(keys), n_cols), dtype=bool)
+        net[found] = sums.to_numpy(dtype=np.int64)[idx[found]]
+        net_ok[found] = ok.to_numpy(dtype=bool)[idx[found]]
+        n_lines = np.zeros(len(keys), dtype=np.int64)
+        n_lines[found] = self.valid_line_counts()[idx[found]]
+        return net, net_ok, n_lines
+
+    def valid_line_counts(self):
+        """net_by_key() 인덱스 순서의 키별 유효 행 수"""
+        keys = self.df[self.key_col].to_numpy() if self.key_col else np.array([], dtype=object)
+        return pd.Series(self.amount_valid.any(axis=1)).groupby(keys, sort=False).sum().to_numpy()
+
+    def valid_lines(self, key):
+        """키의 유효 금액이 있는 명세서 행 위치 (비교로그/명세서 행 표시용)"""
+        return [int(p) for p in self.rows_by_key.get(key, []) if self.amount_valid[p].any()]
+
+    def amount_table(self):
+        """
+        유효 금액을 (key, amount, line, stmt_amount) 한 줄씩 펼친 표 - tolerance_join용
+
+        금액 오름차순, 같은 금액이면 앞 행이 마지막에 오도록 정렬 (merge_asof가 같은 금액 중 마지막 = 파일상 첫 행 선택)
+        """
+        if self._amount_table is None:
+            rows, cols = np.nonzero(self.amount_valid) if self.amount_valid is not None else ([], [])
+            keys = self.df[self.key_col].to_numpy()[rows] if self.key_col else np.array([], dtype=object)
+            amounts = self.amounts[rows, cols] if len(rows) else np.array([], dtype=np.int64)
+            table = pd.DataFrame({'key': pd.Series(keys, dtype=object), 'amount': amounts.astype(np.int64),
+                                  'line': np.asarray(rows, dtype=np.int64), 'col': np.asarray(cols, dtype=np.int64)})
+            table['stmt_amount'] = table['amount']
+            self._amount_table = table.sort_values(['amount', 'line', 'col'], ascending=[True, False, False], kind='stable')
+        return self._amount_table
+
+
+def _silent(*args, **kwargs):
+    pass
+
 
 # 컬럼명 매핑 (자동 추출)
 def find_col(cols, keyword):
     for c in cols:
-        if keyword in c:
+        if isinstance(c, str) and keyword in c:
             return c
     return None
 
-col_name_all = find_col(df_all.columns, '고객')
-col_price_all_1 = find_col(df_all.columns, '객실')
-col_price_all_2 = find_col(df_all.columns, '합계')
-col_vendor = find_col(df_all.columns, '거래처')
-col_ota_no = find_col(df_all.columns, 'OTA')
 
-"""
-# print(f"[DEBUG] 컬럼명 매핑: 고객명={col_name_all}, 객실료={col_price_all_1}, 합계={col_price_all_2}, 거래처={col_vendor}, OTA번호={col_ota_no}")
-"""
+# 금액 컬럼 정규화 (원 단위 정수). 변환 불가 값은 <NA>
+def to_won(series):
+    cleaned = series.astype(str).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(cleaned, errors='coerce').round().astype('Int64')
 
-# Remittances/아고다 데이터의 이름, 금액 컬럼 추정 (유연 처리)
-# 이름 컬럼: 기본 4번째(D열), 부족하면 첫 번째 컬럼 사용
-if df_ota.shape[1] >= 4:
-    col_name_ota = df_ota.columns[3]
-elif df_ota.shape[1] >= 1:
-    col_name_ota = df_ota.columns[0]
-else:
-    col_name_ota = None
-
-# 금액 컬럼: '금액'/'Amount' 등의 키워드 기반 탐색
-ota_price_cols = [col for col in df_ota.columns if any(x in str(col) for x in ['금액', 'Amount', 'amount', 'AMOUNT']) or str(col) in ['G', 'H'] or str(col).startswith('Unnamed')]
-if not ota_price_cols:
-    # G,H 강제 지정은 컬럼이 충분할 때만
-    if df_ota.shape[1] >= 8:
-        ota_price_cols = [df_ota.columns[6], df_ota.columns[7]]
-    else:
-        ota_price_cols = []
-
-result_path = os.path.join(dir_base, '매출_검토_결과.xlsx')
-wb = load_workbook(result_path)
-ws = wb.active
-# 비교로그 시트 생성(기존 있으면 삭제)
-if '비교로그' in wb.sheetnames:
-    del wb['비교로그']
-log_ws = wb.create_sheet('비교로그')
-log_ws.append(['고객명', '전체매출 행번호', '전체매출 가격', '파일명', '행번호', '비교 가격', '원가격'])
-
-# Remittances/아고다 파일별 행 오프셋 기록 (비교 로그용)
-ota_file_map = []  # (파일명, 데이터프레임, 시작행)
-ota_row_offset = 0
-df_ota = pd.DataFrame()
-
-agoda_all_files = [(f, 'xlsx') for f in agoda_xlsx_files] + [(f, 'csv') for f in agoda_csv_files]
-for file, ftype in agoda_all_files:
-    path = os.path.join(directory_ota, file)
-    try:
-        temp_df = pd.read_excel(path) if ftype == 'xlsx' else pd.read_csv(path)
-        ota_file_map.append((file, temp_df, ota_row_offset))
-        ota_row_offset += len(temp_df)
-        df_ota = pd.concat([df_ota, temp_df], ignore_index=True)
-    except Exception as e:
-        print(f"[WARN] 아고다 파일 로드 실패: {file} - {e}")
 
-# 색상 스타일 정의
-fill_yellow = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-fill_blue = PatternFill(start_color='ADD8E6', end_color='ADD8E6', fill_type='solid')
-font_red = Font(color='FF0000')
+def amounts_to_won(series, factor=1.0, strip=r','):
+    """명세서 금액 컬럼 → (int64 원 단위 배열, 변환 성공 마스크)"""
+    cleaned = series.astype(str).str.replace(strip, '', regex=True).str.strip()
+    values = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype='float64') * factor
+    valid = np.isfinite(values)
+    return np.where(valid, np.rint(np.where(valid, values, 0)), 0).astype(np.int64), valid
+
+
+def won_or_none(value):
+    return None if pd.isna(value) else int(value)
+
 
+def read_excel_fast(path, **kwargs):
+    return pd.read_excel(path, engine=EXCEL_READ_ENGINE, **kwargs)
 
-# 이름과 가격 비교 및 색상 처리
-# Remittances 이름 매칭 카운트 추적용
-matched_remit_names = {}
-
-# 1. 전체고객목록에서 아고다인 고객명별로 인덱스와 가격(합계, 객실료) 수집
-agoda_grouped_rows = defaultdict(list)
-for idx, row in df_all.iterrows():
-    vendor = str(row.get('거래처', '')).strip()
-    if vendor != '아고다':
-        continue
-    name = str(row.get(col_name_all, '')).strip()
-    price1 = str(row.get(col_price_all_1, '')).replace(',', '').strip()
-    price2 = str(row.get(col_price_all_2, '')).replace(',', '').strip()
-    try:
-        price1_f = float(price1)
-    except:
-        price1_f = 0.0
-    try:
-        price2_f = float(price2)
-    except:
-        price2_f = 0.0
-    # 합계 우선, 없으면 객실료
-    use_price = price2_f if price2_f else price1_f
-    agoda_grouped_rows[name].append((idx, use_price))
-
-# 2. Remittances에서 이름별 금액 리스트 수집
-otas_by_name = defaultdict(list)
-for _, row in df_ota.iterrows():
-    name = str(row[col_name_ota]).strip()
-    for price_col in ota_price_cols:
+
+READER_VERSION = 2  # read_statement_file 결과가 바뀌면 올림 (캐시된 명세서 다시 읽기)
+
+
+def read_statement_file(path, ota):
+    """
+    명세서 파일 하나에서 키/금액/날짜 컬럼만 문자열로 읽어 표준 컬럼명으로 반환
+
+    - 양식 레지스트리(statement_layouts)로 컬럼을 정하고 그 컬럼만 dtype=str로 사용 (타입 추론 없음)
+    - CSV는 헤더만 먼저 읽고 필요한 컬럼만 읽음. xlsx는 한 번에 전체를 읽고 헤더도 그 결과에서 가져옴
+      (nrows=0/nrows=1로 헤더만 읽으면 헤더 셀이 없는 오른쪽 컬럼(예: 아고다 H열 금액)이 빠지고,
+      openpyxl에서는 usecols로 읽어도 파싱 시간이 줄지 않음)
+    - 반환 컬럼: key, amount_0, amount_1, ..., date(양식에 있으면). 금액은 이후 AMOUNT_POLICY로 int64 변환
+    - 사용한 양식은 df.attrs에 기록 (캐시에 같이 저장되므로 파일마다 한 번만 판별)
+    """
+    if path.endswith('.xlsx'):
+        df = read_excel_fast(path, dtype=str)
+        header = list(df.columns)
+        layout = resolve_layout(ota, header)
+    else:
+        header = list(pd.read_csv(path, nrows=0).columns)
+        layout = resolve_layout(ota, header)
+        usecols = list(dict.fromkeys(c for c in [layout.key] + layout.amounts + [layout.date] if c is not None))
+        df = pd.read_csv(path, usecols=usecols, dtype=str) if usecols else pd.DataFrame(index=pd.RangeIndex(0))
+    out = pd.DataFrame(index=df.index)
+    out[STATEMENT_KEY] = df[layout.key] if layout.key is not None else pd.Series(pd.NA, index=df.index, dtype=object)
+    for c, col in enumerate(layout.amounts):
+        out[f'{STATEMENT_AMOUNT}{c}'] = df[col]
+    if layout.date is not None:
+        out[STATEMENT_DATE] = df[layout.date]
+    out.attrs['layout'] = layout.name
+    out.attrs['fingerprint'] = header_fingerprint(header)
+    out.attrs['registered'] = layout.registered
+    return out
+
+
+# 명세서 파일 로더: 파일마다 한 번만 읽고 마지막에 한 번만 합침
+# 반환: (합친 DataFrame, [(파일명, 시작행, 행수), ...])
+def load_statements(directory, files, label, cache=None, say=print, ota=None):
+    frames = []
+    file_map = []
+    row_offset = 0
+    for file in files:
+        path = os.path.join(directory, file)
+        if ota is not None:
+            reader = partial(read_statement_file, ota=ota)
+            variant = f'{ota}:{READER_VERSION}:{registry_version()}'
+        else:
+            reader = read_excel_fast if file.endswith('.xlsx') else pd.read_csv
+            variant = ''
         try:
-            price = float(str(row[price_col]).replace(',', '').strip())
-            otas_by_name[name].append(price)
-        except:
+            temp_df = cache.load(path, reader, variant) if cache else reader(path)
+        except Exception as e:
+            say(f"[WARN] {label} 파일 로드 실패: {file} - {e}")
             continue
+        if temp_df.attrs.get('registered') is False:
+            say(f"[양식] {file}: 등록되지 않은 헤더 (fingerprint={temp_df.attrs.get('fingerprint')}), {temp_df.attrs.get('layout')} 규칙 사용")
+        frames.append(temp_df)
+        file_map.append((file, row_offset, len(temp_df)))
+        row_offset += len(temp_df)
+    if not frames:
+        return pd.DataFrame(), file_map
+    return pd.concat(frames, ignore_index=True), file_map
+
+
+# 합친 DataFrame 위치 → (파일명, 파일 내 엑셀 행번호). file_map은 시작행 오름차순이므로 이진 탐색
+def source_row(file_map, abs_idx):
+    i = bisect.bisect_right(file_map, abs_idx, key=lambda entry: entry[1]) - 1
+    if i < 0:
+        return None, None
+    fname, offset, n_rows = file_map[i]
+    if abs_idx >= offset + n_rows:
+        return None, None
+    return fname, int(abs_idx - offset + 2)  # 2: 엑셀 헤더 보정, 비교로그/출력에 numpy 스칼라가 남지 않게 int로
+
+
+def statement_id(file_map, abs_idx):
+    fname, file_row = source_row(file_map, abs_idx)
+    return f'{fname}:{file_row}' if fname is not None else str(abs_idx)
+
+
+def load_customer_list(source):
+    """
+    전체고객 목록(또는 결과 파일) 첫 시트를 읽고 비교용 컬럼을 추가
 
-# 3. 매칭 처리
-used_ota_idx = set()
-for name, rows in agoda_grouped_rows.items():
-    total_price = sum(price for _, price in rows)
-    # Remittances에서 해당 이름의 금액 중 합과 일치하는 것 찾기
-    found = False
-    for i, price in enumerate(otas_by_name.get(name, [])):
-        if price == total_price and (name, i) not in used_ota_idx:
-            # 매칭된 Remittances 금액은 중복 사용 방지
-            used_ota_idx.add((name, i))
-            found = True
-            break
-    if found:
-        # 전체고객목록의 해당 이름 모든 행을 노란색으로 표시
-        for idx, _ in rows:
-            for cell in ws[idx+2]:
-                cell.fill = fill_yellow
+    Args:
+        source: 파일 경로 또는 이미 연 openpyxl Workbook
+            - Workbook이면 그 통합문서에서 바로 DataFrame을 만들고 다시 파싱하지 않음 (색상 처리용으로 연 것 재사용)
+            - 경로면 EXCEL_READ_ENGINE으로 데이터만 읽음
+
+    CUSTOMER_COLUMNS에 해당하는 컬럼만 읽음. 추가 컬럼: name, ota_no, price1_won(객실료), price2_won(합계), use_price(합계 우선, 없거나 0이면 객실료),
+    vendor(거래처, category), ws_row(엑셀 행번호 = 인덱스 + 2, 빈 행도 DataFrame에 남으므로 그대로 대응)
+    """
+    if isinstance(source, Workbook):
+        read = partial(pd.read_excel, source, sheet_name=0, engine='openpyxl')
     else:
-        # 기존 개별 비교 로직(잔여 케이스) 수행
-        for idx, _ in rows:
-            row = df_all.iloc[idx]
-            vendor = str(row.get('거래처', '')).strip()
-            if vendor != '아고다':
+        read = partial(read_excel_fast, source, sheet_name=0)
+
+    # 헤더만 먼저 읽어 필요한 컬럼을 정하고, 그 컬럼만 읽음 (OTA번호는 문자열로)
+    header = read(nrows=0).columns
+    cols = {role: find_col(header, keyword) for role, keyword in CUSTOMER_COLUMNS.items()}
+    col_name_all = cols['name']
+    col_price_all_1 = cols['price1']
+    col_price_all_2 = cols['price2']
+    col_vendor = cols['vendor']
+    col_ota_no = cols['ota_no']
+    usecols = list(dict.fromkeys(c for c in cols.values() if c is not None))
+    df_all = read(usecols=usecols, dtype={col_ota_no: str} if col_ota_no else None)
+
+    # print(f"[DEBUG] 컬럼명 매핑: 고객명={col_name_all}, 객실료={col_price_all_1}, 합계={col_price_all_2}, 거래처={col_vendor}, OTA번호={col_ota_no}")
+
+    empty = pd.Series('', index=df_all.index)
+    # 빈 셀은 기존처럼 'nan' 문자열로 (str 타입 컬럼의 astype(str)은 NaN을 그대로 두어 이후 groupby에서 행이 빠짐)
+    # OTA번호 컬럼이 있으면 항상 문자열로 변환(.0 제거)
+    if col_ota_no:
+        df_all[col_ota_no] = df_all[col_ota_no].map(str).str.replace('.0', '', regex=False).str.strip()
+    df_all['ota_no'] = df_all[col_ota_no] if col_ota_no else empty
+    df_all['name'] = df_all[col_name_all].map(str).str.strip() if col_name_all else empty
+
+    na_prices = pd.array([pd.NA] * len(df_all), dtype='Int64')
+    df_all['price1_won'] = to_won(df_all[col_price_all_1]) if col_price_all_1 else na_prices
+    df_all['price2_won'] = to_won(df_all[col_price_all_2]) if col_price_all_2 else na_prices
+    df_all['use_price'] = df_all['price2_won'].where(df_all['price2_won'].fillna(0) != 0, df_all['price1_won'])
+
+    df_all['vendor'] = (df_all[col_vendor].astype(str).str.strip() if col_vendor else empty).astype('category')
+    df_all['ws_row'] = df_all.index + 2
+    return df_all
+
+
+def split_by_vendor(df_all):
+    """거래처별 분할 (한 번만). 인덱스는 원본 그대로 유지"""
+    return dict(iter(df_all.groupby('vendor', observed=True, sort=False)))
+
+
+def load_statement_set(statements_dir, files, label, ota, cache=None, say=print):
+    """명세서 파일들을 양식에 맞는 컬럼만 읽어 StatementSet 생성 (키 → 행 위치 인덱스, 원 단위 금액 배열 포함)"""
+    df, file_map = load_statements(statements_dir, files, label, cache, say, ota)
+    stmts = StatementSet(df, file_map)
+    if not df.empty:
+        # 예약번호/이름을 문자열로 변환 (FutureWarning 방지)
+        stmts.key_col = STATEMENT_KEY
+        df[STATEMENT_KEY] = df[STATEMENT_KEY].astype(str).str.strip()
+        stmts.price_cols = [c for c in df.columns if c.startswith(STATEMENT_AMOUNT)]
+        # 키 → 행 위치 인덱스 (개별 행 매칭에서 전체 스캔 대신 조회)
+        stmts.rows_by_key = df.groupby(STATEMENT_KEY, sort=False).indices
+    stmts.set_amounts(AMOUNT_POLICY[ota])
+    repeated = stmts.drop_repeated_lines() if ota in RESERVATION_KEYED else 0
+    if repeated:
+        say(f"[{label}] 다른 파일과 같은 명세서 행 {repeated}개 제외 (같은 예약번호/금액/날짜)")
+    return stmts
+
+
+def load_statement_sets(statements_dir, cache=None, say=print):
+    """ota-adjustment 폴더의 아고다/부킹/익스피디아 명세서를 읽어 {거래처: StatementSet} 반환"""
+    files = sorted(os.listdir(statements_dir))
+
+    # 아고다 파일 목록 (기존 Remittances 엑셀 + 새 아고다 CSV 모두 지원)
+    agoda_xlsx_files = [f for f in files if f.startswith('Remittances') and f.endswith('.xlsx')]
+    agoda_csv_files = [f for f in files if f.startswith('아고다_') and f.endswith('.csv')]
+    agoda = load_statement_set(statements_dir, agoda_xlsx_files + agoda_csv_files, '아고다',
+                               '아고다', cache, say)
+
+    # 부킹 CSV 파일 읽기
+    booking_files = [f for f in files if f.startswith('부킹') and f.endswith('.csv')]
+    booking = load_statement_set(statements_dir, booking_files, '부킹',
+                                 '부킹닷컴', cache, say)
+
+    # 익스피디아 CSV 파일 읽기
+    expedia_files = [f for f in files if f.startswith('익스피디아') and f.endswith('.csv')]
+    expedia = load_statement_set(statements_dir, expedia_files, '익스피디아',
+                                 '익스피디아', cache, say)
+
+    if cache:
+        evicted = cache.evict_missing()
+        say(f"[캐시] 명세서 {cache.hits}개 캐시 사용, {cache.misses}개 새로 읽음, {evicted}개 정리")
+
+    return {'아고다': agoda, '부킹닷컴': booking, '익스피디아': expedia}
+
+
+def tolerance_join(stmts, keys, amounts, tolerance, ok=None):
+    """
+    (키, 금액) 조회마다 같은 키의 명세서 금액 중 허용 오차 이내에서 가장 가까운 행 찾기 (merge_asof, 파이썬 반복 없음)
+
+    Args:
+        stmts: StatementSet
+        keys: 조회 키 배열 (예약번호/이름, None이면 조회 안 함)
+        amounts: 조회 금액 배열 (원 단위 int64)
+        tolerance: 허용 오차(원)
+        ok: 조회할 항목 마스크 (금액이 있는 행 등)
+
+    Returns:
+        (명세서 행 위치 배열(-1=없음), 금액 차이 배열) - 같은 차이면 파일상 앞 행
+    """
+    n = len(keys)
+    lines = np.full(n, -1, dtype=np.int64)
+    diffs = np.zeros(n, dtype=np.int64)
+    table = stmts.amount_table()
+    ok = pd.notna(np.asarray(keys, dtype=object)) & (np.ones(n, dtype=bool) if ok is None else np.asarray(ok, dtype=bool))
+    if table.empty or not ok.any():
+        return lines, diffs
+
+    qid = np.flatnonzero(ok)
+    left = pd.DataFrame({'key': pd.Series(np.asarray(keys, dtype=object)[qid], dtype=object),
+                         'amount': np.asarray(amounts, dtype=np.int64)[qid], 'qid': qid})
+    merged = pd.merge_asof(left.sort_values('amount', kind='stable'), table[['key', 'amount', 'line', 'stmt_amount']],
+                           on='amount', by='key', direction='nearest', tolerance=int(tolerance))
+    found = merged['line'].notna().to_numpy()
+    q = merged['qid'].to_numpy()[found]
+    lines[q] = merged['line'].to_numpy()[found].astype(np.int64)
+    diffs[q] = np.abs(merged['amount'].to_numpy()[found] - merged['stmt_amount'].to_numpy()[found].astype(np.int64))
+    return lines, diffs
+
+
+def nearest_line(line_a, diff_a, line_b, diff_b):
+    """tolerance_join 결과 두 개 중 행마다 더 가까운 쪽 (같으면 파일상 앞 행)"""
+    use_b = (line_b >= 0) & ((line_a < 0) | (diff_b < diff_a) | ((diff_b == diff_a) & (line_b < line_a)))
+    return np.where(use_b, line_b, line_a), np.where(use_b, diff_b, diff_a)
+
+
+def assign_statement_lines(stmts, lines, prices, prices_ok, tolerance):
+    """
+    같은 키(예약번호/이름) 그룹의 전체고객 목록 행 ↔ 명세서 행 1:1 배정 (line_assignment.assign)
+
+    Args:
+        stmts: StatementSet
+        lines: 그룹의 명세서 행 위치
+        prices, prices_ok: (행 수, 금액 후보 수) 전체고객 목록 금액
+        tolerance: 허용 오차(원)
+
+    Returns:
+        행마다 배정된 명세서 행 위치 (-1=없음)
+    """
+    lines = np.asarray(lines, dtype=np.int64)
+    if len(lines) == 0:
+        return np.full(len(prices), -1, dtype=np.int64)
+    diff = amount_diffs(prices, prices_ok, stmts.amounts[lines], stmts.amount_valid[lines])
+    picked = assign(diff, tolerance)
+    return np.where(picked >= 0, lines[np.maximum(picked, 0)], -1)
+
+
+def assign_by_key(stmts, keys, rows, prices, prices_ok, tolerance, nearest, used_lines=()):
+    """
+    rows를 키별로 묶어 assign_statement_lines 실행 → 전체 행 기준 배정 배열 (-1=없음)
+
+    nearest(tolerance_join 결과)에 허용 오차 이내 후보가 하나도 없는 그룹은 배정 생략.
+    used_lines: 앞 단계(그룹 합산)에서 이미 쓴 명세서 행 (제외)
+    """
+    assigned = np.full(len(keys), -1, dtype=np.int64)
+    by_key = defaultdict(list)
+    for i in rows:
+        if keys[i] is not None and keys[i] in stmts.rows_by_key:
+            by_key[keys[i]].append(i)
+    for key, group in by_key.items():
+        group = np.sort(np.asarray(group, dtype=np.int64))  # 전체고객 목록 행 순서
+        if not (nearest[group] >= 0).any():
+            continue
+        lines = [p for p in stmts.rows_by_key[key] if p not in used_lines]
+        assigned[group] = assign_statement_lines(stmts, lines, prices[group], prices_ok[group], tolerance)
+    return assigned
+
+
+def match_agoda(df_rows, agoda, say=print, reserved_keys=()):
+    """
+    아고다 비교: 고객명별 합계를 Remittances 금액과 비교, 실패하면 행 단위 비교(잔여 케이스)
+    행 단위 비교는 같은 Remittances 이름 안에서 행 ↔ Remittances 행을 1:1 배정 (객실료/합계 중 가까운 금액),
+    남은 행은 부분합 매칭 (여러 행 합 = 여러 Remittances 행 합, AGODA_SUBSET_* 제한)
+
+    reserved_keys: df_rows 밖의 고객과 정확히 일치하는 Remittances 이름 (증분 비교에서 일부 행만 다시 비교할 때 유사 이름 후보에서 제외)
+
+    Remittances에 같은 이름이 없으면 유사 이름(NameIndex, AGODA_NAME_THRESHOLD 이상)으로 대신 비교.
+    행마다 이름 유사도를 RowResult.name_score와 비교로그 '이름 유사도' 열에 기록
+
+    Returns:
+        (RowResult 목록, 비교로그 행 목록)
+    """
+    results = []
+    log_entries = []
+    df_ota = agoda.df
+
+    # 1. 전체고객목록에서 아고다인 고객명별로 인덱스와 가격(합계 우선, 없으면 객실료) 수집
+    names = df_rows['name'].to_numpy()
+    ws_rows = df_rows['ws_row'].to_numpy(dtype='int64')
+    price1 = df_rows['price1_won'].fillna(0).to_numpy(dtype='int64')
+    price1_ok = df_rows['price1_won'].notna().to_numpy()
+    price2 = df_rows['price2_won'].fillna(0).to_numpy(dtype='int64')
+    price2_ok = df_rows['price2_won'].notna().to_numpy()
+    use_price = df_rows['use_price'].fillna(0).to_numpy(dtype='int64')
+    use_price_ok = df_rows['use_price'].notna().to_numpy()
+    agoda_grouped_rows = df_rows.groupby('name', sort=False).indices
+
+    tolerance = AMOUNT_POLICY['아고다']['tolerance']
+
+    # 2. 고객명 → Remittances 이름. 같은 이름이 없는 고객만 유사 이름 검색 (다른 고객과 정확히 일치하는 이름은 후보에서 제외)
+    exact_names = {name for name in agoda_grouped_rows if name in agoda.rows_by_key}
+    exact_names |= {name for name in reserved_keys if name in agoda.rows_by_key}
+    name_index = None
+    fuzzy_count = 0
+    key_by_name = {}
+    score_by_name = {}
+    for name in agoda_grouped_rows:
+        key, score = (name, 1.0) if name in exact_names else (None, 0.0)
+        if key is None and agoda.rows_by_key:
+            if name_index is None:
+                name_index = NameIndex(agoda.rows_by_key)
+            similar, score = name_index.best(name, exclude=exact_names)
+            score = round(score, 3)
+            if score >= AGODA_NAME_THRESHOLD:
+                key = similar
+                fuzzy_count += 1
+                say(f"[아고다] 유사 이름 매칭: {name} → {similar} (유사도 {score})")
+        key_by_name[name] = key
+        score_by_name[name] = score
+
+    # 3. 금액 조회를 한 번에: 이름별 합계, 행별 객실료/합계 → 같은 이름의 가장 가까운 Remittances 금액 (허용 오차 이내)
+    group_keys = np.array([key_by_name[name] for name in agoda_grouped_rows], dtype=object)
+    group_totals = np.array([use_price[rows].sum() for rows in agoda_grouped_rows.values()], dtype=np.int64)
+    group_lines, _ = tolerance_join(agoda, group_keys, group_totals, tolerance)
+    # 유사 이름으로 여러 고객명이 같은 Remittances 이름에 연결되면 그 이름의 Remittances 행을 고객명 합계와 1:1 배정
+    # (한 Remittances 행이 여러 고객명을 동시에 맞추지 않도록)
+    groups_by_key = defaultdict(list)
+    for g, key in enumerate(group_keys):
+        if key is not None:
+            groups_by_key[key].append(g)
+    shared_keys = {key: gs for key, gs in groups_by_key.items() if len(gs) > 1}
+    for key, gs in shared_keys.items():
+        lines = np.asarray(agoda.rows_by_key[key], dtype=np.int64)
+        diff = amount_diffs(group_totals[gs][:, None], np.ones((len(gs), 1), dtype=bool),
+                            agoda.amounts[lines], agoda.amount_valid[lines])
+        picked = assign(diff, tolerance)
+        group_lines[gs] = np.where(picked >= 0, lines[np.maximum(picked, 0)], -1)
+    # 한 줄로 안 맞으면 이름별 순액(모든 Remittances 행 합계, 조정/취소 포함)과 비교
+    net, net_ok, _ = agoda.net_lookup(group_keys)
+    group_net = ~(group_lines >= 0) & ((np.abs(net - group_totals[:, None]) <= tolerance) & net_ok).any(axis=1)
+    # 순액은 이름의 모든 행을 쓰므로 한 고객명만: 같은 이름의 행을 이미 다른 고객명이 썼으면 없음, 아니면 먼저 나온 고객명
+    for key, gs in shared_keys.items():
+        claimed = (group_lines[gs] >= 0).any()
+        for g in gs:
+            if group_net[g] and claimed:
+                group_net[g] = False
+            claimed = claimed or group_net[g]
+    row_keys = np.array([key_by_name[name] for name in names], dtype=object)
+    row_lines, _ = nearest_line(*tolerance_join(agoda, row_keys, price1, tolerance, price1_ok),
+                                *tolerance_join(agoda, row_keys, price2, tolerance, price2_ok))
+
+    # 4. 그룹 합산이 안 된 행을 Remittances 이름별로 1:1 배정 (합산에 쓴 Remittances 행 제외)
+    group_matched = group_lines >= 0
+    group_used = set(group_lines[group_matched].tolist())
+    for g in np.flatnonzero(group_net):
+        group_used.update(agoda.valid_lines(group_keys[g]))
+    pending = [i for g, rows in enumerate(agoda_grouped_rows.values()) if not (group_matched[g] or group_net[g]) for i in rows]
+    assigned = assign_by_key(agoda, row_keys, pending, np.stack([price1, price2], axis=1),
+                             np.stack([price1_ok, price2_ok], axis=1), tolerance, row_lines, group_used)
+
+    # 5. 1:1로 안 맞은 행은 같은 이름 안에서 부분합 매칭 (여러 Remittances 행으로 나뉜 숙박, 따로 결제된 예약 여러 건)
+    used_lines = group_used | set(assigned[assigned >= 0].tolist())
+    leftover = defaultdict(list)
+    for i in pending:
+        if assigned[i] < 0 and use_price_ok[i] and row_keys[i] is not None:
+            leftover[row_keys[i]].append(i)
+    subset_lines = {}  # 행 → Remittances 행 위치 목록
+    subset_count = 0
+    deadline = time.perf_counter() + AGODA_SUBSET_TIME_BUDGET
+    for key, rows in leftover.items():
+        lines = [p for p in agoda.rows_by_key[key] if p not in used_lines and agoda.amount_valid[p].any()]
+        if not lines or len(rows) + len(lines) < 3:
+            continue
+        # Remittances 행마다 첫 번째 유효 금액 사용
+        line_amounts = [agoda.amounts[p, np.argmax(agoda.amount_valid[p])] for p in lines]
+        for sub_rows, sub_lines in balanced_subsets(use_price[rows], line_amounts, tolerance,
+                                                    AGODA_SUBSET_MAX_ITEMS, deadline):
+            subset_count += 1
+            for r in sub_rows:
+                subset_lines[rows[r]] = [lines[j] for j in sub_lines]
+
+    for g, (name, rows) in enumerate(agoda_grouped_rows.items()):
+        key = key_by_name[name]
+        score = score_by_name[name]
+        pos = agoda.rows_by_key[key] if key is not None else []
+        if group_lines[g] >= 0:
+            # 전체고객목록의 해당 이름 모든 행을 노란색으로 표시
+            line_id = statement_id(agoda.file_map, group_lines[g])
+            for i in rows:
+                results.append(RowResult(int(ws_rows[i]), '아고다', name, int(use_price[i]), STATUS_MATCHED, [line_id], score))
+            continue
+        if group_net[g]:
+            # 순액 일치: 모든 행을 노란색, 명세서 행은 전부 기록
+            line_ids = [statement_id(agoda.file_map, line) for line in agoda.valid_lines(key)]
+            for i in rows:
+                results.append(RowResult(int(ws_rows[i]), '아고다', name, int(use_price[i]), STATUS_MATCHED, line_ids, score))
+            continue
+
+        # 6. 개별 행 결과
+        for i in rows:
+            ws_row = int(ws_rows[i])
+            price = int(use_price[i]) if use_price_ok[i] else None
+            if len(pos) == 0:
+                # Remittances에 이름이 없음 -> 파란색, 비교로그에 기록
+                results.append(RowResult(ws_row, '아고다', name, price, STATUS_NOT_FOUND, name_score=score))
+                log_entries.append([name, ws_row, price, '아고다 데이터 없음', '', '', '', score])
                 continue
-            name = str(row.get(col_name_all, '')).strip()
-            price1 = str(row.get(col_price_all_1, '')).replace(',', '').strip()
-            price2 = str(row.get(col_price_all_2, '')).replace(',', '').strip()
-            # 금액을 float으로 변환
-            try:
-                price1_f = float(price1)
-            except:
-                price1_f = None
-            try:
-                price2_f = float(price2)
-            except:
-                price2_f = None
-            # 합계 우선, 없으면 객실료
-            use_price = price2_f if price2_f else price1_f
-            # 이름이 일치하는 Remittances 행 찾기
-            match = df_ota[df_ota[col_name_ota].astype(str).str.strip() == name]
-            if not match.empty:
-                price_match = False
-                log_info = None
-                for abs_idx, match_row in match.iterrows():
-                    for price_col in ota_price_cols:
-                        try:
-                            ota_price_f = float(str(match_row[price_col]).replace(',', '').strip())
-                        except:
-                            continue
-                        if (price1_f is not None and ota_price_f == price1_f) or (price2_f is not None and ota_price_f == price2_f):
-                            price_match = True
-                            # Remittances 매칭 카운트 기록
-                            matched_remit_names[name] = matched_remit_names.get(name, 0) + 1
-                            break
-                        # 로그 정보 저장 (조건 불일치 시)
-                        if not price_match and log_info is None:
-                            for fname, df, offset in ota_file_map:
-                                if offset <= abs_idx < offset + len(df):
-                                    file_row = abs_idx - offset + 2  # 2: 엑셀 헤더 보정
-                                    log_info = [name, idx+2, use_price, fname, file_row, str(match_row[price_col]), str(match_row[price_col])]
-                                    break
-                    if price_match:
-                        break
-                if price_match:
-                    for cell in ws[idx+2]:
-                        cell.fill = fill_yellow
-                else:
-                    # Remittances에 이름이 있지만, 이미 매칭된 횟수 이상이면 표시 없음
-                    if matched_remit_names.get(name, 0) > 0:
-                        matched_remit_names[name] -= 1
-                        continue
-                    for cell in ws[idx+2]:
-                        cell.font = font_red
-                    if log_info:
-                        log_ws.append(log_info)
-                    else:
-                        # log_info가 None인 경우에도 비교로그에 한 줄 남김
-                        log_ws.append([name, idx+2, use_price, '-', '-', '불일치', '-'])
+
+            if assigned[i] >= 0:
+                line_id = statement_id(agoda.file_map, assigned[i])
+                results.append(RowResult(ws_row, '아고다', name, price, STATUS_MATCHED, [line_id], score))
+                continue
+            if i in subset_lines:
+                line_ids = [statement_id(agoda.file_map, line) for line in subset_lines[i]]
+                results.append(RowResult(ws_row, '아고다', name, price, STATUS_MATCHED, line_ids, score))
+                continue
+            results.append(RowResult(ws_row, '아고다', name, price, STATUS_MISMATCH, name_score=score))
+            # 로그: 금액이 맞는 Remittances 행이 다른 행에 이미 배정됐으면 그 행, 아니면 첫 번째 유효 금액. 없으면 불일치 한 줄
+            valid = agoda.amount_valid[pos]
+            if valid.any():
+                line = row_lines[i] if row_lines[i] >= 0 else pos[np.argmax(valid.any(axis=1))]
+                c = np.argmax(agoda.amount_valid[line])
+                fname, file_row = source_row(agoda.file_map, line)
+                raw = str(df_ota.iat[line, df_ota.columns.get_loc(agoda.price_cols[c])])
+                log_entries.append([name, ws_row, price, fname, file_row, raw, raw, score])
             else:
-                # Remittances에 이름이 없음 -> 파란색
-                for cell in ws[idx+2]:
-                    cell.fill = fill_blue
+                log_entries.append([name, ws_row, price, '-', '-', '불일치', '-', score])
+
+    if fuzzy_count:
+        say(f"[아고다] 유사 이름 매칭 {fuzzy_count}명 (기준 {AGODA_NAME_THRESHOLD})")
+    if group_net.any():
+        say(f"[아고다] 이름별 순액 매칭 {int(group_net.sum())}명")
+    if subset_count:
+        say(f"[아고다] 부분합 매칭 {subset_count}건, {len(subset_lines)}개 행")
+    return results, log_entries
+
+
+def match_booking(df_rows, booking, say=print):
+    """
+    부킹닷컴 비교: 예약번호(앞 10자리)별 합계를 부킹 순액(모든 행 합계)×0.82와 비교, 실패하면 행 단위 비교
+    행 단위 비교는 같은 예약번호 안에서 행 ↔ 부킹 행을 1:1 배정
+
+    Returns:
+        (RowResult 목록, 비교로그 행 목록)
+    """
+    results = []
+    log_entries = []
+    df_booking = booking.df
+
+    say("\n" + "="*80)
+    say("부킹닷컴 비교 시작")
+    say("="*80)
+
+    # 1단계: 부킹닷컴 예약번호별 그룹화 (앞 10자리 기준)
+    names = df_rows['name'].to_numpy()
+    ws_rows = df_rows['ws_row'].to_numpy(dtype='int64')
+    ota_nos = df_rows['ota_no'].str[:10].to_numpy()
+    use_price = df_rows['use_price'].fillna(0).to_numpy(dtype='int64')
+    use_price_ok = df_rows['use_price'].notna().to_numpy()
+    booking_grouped_by_ref = {ref: rows for ref, rows in pd.Series(ota_nos).groupby(ota_nos, sort=False).indices.items() if ref}
+    # 고객명별 그룹화 (개별 행 매칭 순서용)
+    booking_grouped_rows = df_rows.groupby('name', sort=False).indices
+
+    say(f"\n[1단계] 전체고객목록에서 부킹닷컴 예약번호 {len(booking_grouped_by_ref)}개, 고객 {len(booking_grouped_rows)}명 그룹화 완료")
+
+    # 2단계: 부킹 데이터 예약번호별 순액 (모든 파일의 유효 행 합계, 취소/조정 행 포함)
+    # 부킹 파일이 없거나 금액 컬럼을 못 찾은 양식(컬럼 9개 미만)이면 순액 비교 없이 모든 행 건너뜀
+    refs = list(booking_grouped_by_ref)
+    has_amounts = not df_booking.empty and booking.amounts.shape[1] > 0
+    if refs and has_amounts:
+        net, net_ok, net_lines = booking.net_lookup(refs)
+    else:
+        net, net_ok, net_lines = (np.zeros((len(refs), 1), dtype=np.int64), np.zeros((len(refs), 1), dtype=bool),
+                                  np.zeros(len(refs), dtype=np.int64))
+    if not df_booking.empty:
+        say(f"\n[2단계] 부킹 CSV 파일 데이터 읽기 시작 (총 {len(df_booking)}행)")
+        say(f"부킹 CSV 컬럼: {list(df_booking.columns[:10])}")
+
+    tolerance = AMOUNT_POLICY['부킹닷컴']['tolerance']
+    say("\n[3단계] 예약번호 기준 그룹 합산 매칭 시작")
+    group_matched_count = 0
+    matched_rows = set()
+
+    for k, (ref_no, rows) in enumerate(booking_grouped_by_ref.items()):
+        total_price = use_price[rows].sum()
+        has_net = bool(net_ok[k, 0])
+        booking_price = int(net[k, 0]) if has_net else None
+
+        customer_names = ', '.join(set(names[rows]))
+        say(f"\n예약번호: {ref_no} (고객명: {customer_names})")
+        say(f"  전체고객목록 행 수: {len(rows)}, 가격 합계: {total_price}")
+        say(f"  부킹 데이터 가격: {booking_price if has_net else 'N/A'}" + (f" ({net_lines[k]}행 순액)" if net_lines[k] > 1 else ''))
+
+        if has_net and abs(total_price - booking_price) <= tolerance:
+            say(f"  [OK] 예약번호 그룹 합산 매칭 성공! (전체고객목록 합계: {total_price} = 부킹 가격: {booking_price})")
+            group_matched_count += 1
+            line_ids = [statement_id(booking.file_map, line) for line in booking.valid_lines(ref_no)]
+            for i in rows:
+                matched_rows.add(i)
+                results.append(RowResult(int(ws_rows[i]), '부킹닷컴', names[i], int(use_price[i]), STATUS_MATCHED, line_ids))
+            say(f"  → {len(rows)}개 행 모두 노란색 표시")
+        else:
+            say(f"  [SKIP] 예약번호 그룹 합산 매칭 실패")
+
+    say(f"\n[완료] 예약번호 기준 그룹 합산 매칭: {group_matched_count}건, {len(matched_rows)}개 행 처리됨")
+
+    # 4단계: 매칭되지 않은 행에 대해 개별 행 매칭
+    say("\n[4단계] 개별 행 매칭 시작 (그룹 합산 실패한 행만)")
+    # 행별 가장 가까운 부킹 금액 (허용 오차 이내)을 한 번에 조회
+    row_lines, _ = tolerance_join(booking, ota_nos, use_price, tolerance, use_price_ok)
+    pending = [i for i in range(len(df_rows)) if i not in matched_rows and use_price_ok[i]]
+    assigned = assign_by_key(booking, ota_nos, pending, use_price[:, None], use_price_ok[:, None], tolerance, row_lines)
+    for name, rows in booking_grouped_rows.items():
+        for i in rows:
+            if i in matched_rows:
+                continue
+
+            ws_row = int(ws_rows[i])
+            ota_no = ota_nos[i]
+            if not use_price_ok[i] or not has_amounts:
+                results.append(RowResult(ws_row, '부킹닷컴', name, None, STATUS_SKIPPED))
+                continue
+            price = int(use_price[i])
+
+            pos = booking.rows_by_key.get(ota_no, [])
+            say(f"  행 {ws_row}: OTA번호={ota_no}, 가격={price}, 부킹매칭={len(pos)}건")
+
+            if len(pos) == 0:
+                say(f"    → 부킹 데이터에 예약번호 없음 (파란색 표시)")
+                results.append(RowResult(ws_row, '부킹닷컴', name, price, STATUS_NOT_FOUND))
                 # 비교로그에 기록
-                log_ws.append([name, idx+2, use_price, '아고다 데이터 없음', '', '', ''])
-
-
-# 부킹닷컴 비교 처리
-print("\n" + "="*80)
-print("부킹닷컴 비교 시작")
-print("="*80)
-matched_booking_refs = {}
-
-# 1단계: 부킹닷컴 예약번호별 그룹화 (앞 10자리 기준)
-booking_grouped_by_ref = defaultdict(list)
-booking_grouped_rows = defaultdict(list)
-for idx, row in df_all.iterrows():
-    vendor = str(row.get('거래처', '')).strip()
-    if vendor != '부킹닷컴':
-        continue
-    name = str(row.get(col_name_all, '')).strip()
-    ota_no = str(row.get(col_ota_no, '')).strip()[:10]
-    price1 = str(row.get(col_price_all_1, '')).replace(',', '').strip()
-    price2 = str(row.get(col_price_all_2, '')).replace(',', '').strip()
-    try:
-        price1_f = float(price1)
-    except:
-        price1_f = 0.0
-    try:
-        price2_f = float(price2)
-    except:
-        price2_f = 0.0
-    use_price = price2_f if price2_f else price1_f
-    
-    # 예약번호별 그룹화
-    if ota_no:
-        booking_grouped_by_ref[ota_no].append((idx, use_price, name))
-    # 고객명별 그룹화 (백업용)
-    booking_grouped_rows[name].append((idx, use_price))
-
-print(f"\n[1단계] 전체고객목록에서 부킹닷컴 예약번호 {len(booking_grouped_by_ref)}개, 고객 {len(booking_grouped_rows)}명 그룹화 완료")
-
-# 2단계: 부킹 데이터 수집
-booking_by_ref = {}
-if not df_booking.empty:
-    print(f"\n[2단계] 부킹 CSV 파일 데이터 읽기 시작 (총 {len(df_booking)}행)")
-    print(f"부킹 CSV 컬럼: {list(df_booking.columns[:10])}")
-    
-    for b_idx, b_row in df_booking.iterrows():
-        try:
-            b_ref = str(b_row.iloc[1]).strip()
-            if booking_price_col and booking_price_col in df_booking.columns:
-                b_price = float(str(b_row[booking_price_col]).replace(',', '').strip())
+                log_entries.append([name, ws_row, price, '부킹닷컴 데이터 없음', '', '', ''])
+                continue
+
+            valid = booking.amount_valid[pos, 0]
+            adjusted = booking.amounts[pos, 0]
+            say(f"    부킹 조정가격(×0.82)={adjusted[valid].tolist()}, 비교={price}")
+            if assigned[i] >= 0:
+                results.append(RowResult(ws_row, '부킹닷컴', name, price, STATUS_MATCHED, [statement_id(booking.file_map, assigned[i])]))
+                say(f"    [OK] 개별 행 매칭 성공! → 노란색 표시")
+                continue
+
+            results.append(RowResult(ws_row, '부킹닷컴', name, price, STATUS_MISMATCH))
+            if row_lines[i] >= 0:
+                say(f"    [ERROR] 같은 금액의 부킹 행이 다른 행에 이미 매칭됨 - 빨간색 표시 + 비교로그 기록")
+            else:
+                say(f"    [ERROR] 불일치 - 빨간색 표시 + 비교로그 기록")
+            if valid.any():
+                line = row_lines[i] if row_lines[i] >= 0 else pos[np.argmax(valid)]
+                booking_file_name, file_row = source_row(booking.file_map, line)
+                raw = str(df_booking.iat[line, df_booking.columns.get_loc(booking.price_cols[0])])
+                log_entries.append([name, ws_row, price, booking_file_name or '부킹파일', file_row, str(booking.amounts[line, 0]), raw])
             else:
-                b_price = float(str(b_row.iloc[8]).replace(',', '').strip())
-            booking_by_ref[b_ref] = round(b_price * 0.82)
-        except:
+                log_entries.append([name, ws_row, price, '-', '-', '불일치', '-'])
+
+    say(f"\n[완료] 부킹닷컴 비교 완료")
+    say("="*80)
+    return results, log_entries
+
+
+def match_expedia(df_rows, expedia, say=print):
+    """
+    익스피디아 비교: 예약번호별로 처리금액과 비교 (허용 오차 이내 가장 가까운 금액, 허용 오차는 AMOUNT_POLICY)
+    예약번호 순액(모든 익스피디아 행 합계)이 행 합계와 맞으면 한 번에 매칭, 아니면 행 ↔ 익스피디아 행을 1:1 배정
+
+    Returns:
+        (RowResult 목록, 비교로그 행 목록)
+    """
+    results = []
+    log_entries = []
+    df_expedia = expedia.df
+    tolerance = AMOUNT_POLICY['익스피디아']['tolerance']
+
+    say("\n" + "="*80)
+    say("익스피디아 비교 시작")
+    say("="*80)
+
+    expedia_matched_count = 0
+    expedia_notfound_count = 0
+    expedia_mismatch_count = 0
+
+    names = df_rows['name'].to_numpy()
+    ws_rows = df_rows['ws_row'].to_numpy(dtype='int64')
+    ota_nos = df_rows['ota_no'].to_numpy()
+    use_price = df_rows['use_price'].fillna(0).to_numpy(dtype='int64')
+    use_price_ok = df_rows['use_price'].notna().to_numpy()
+    # 금액 컬럼을 못 찾은 양식(컬럼 6개 미만)이면 순액/1:1 매칭 없이 예약번호가 있는 행은 모두 불일치
+    has_amounts = expedia.amounts is not None and expedia.amounts.shape[1] > 0
+    # 예약번호별 순액 매칭: 행이 여러 개거나 익스피디아 행이 여러 개(취소/조정)인 예약번호는 합계끼리 먼저 비교
+    net_matched = {}  # 행 → 익스피디아 행 위치 목록
+    priced = np.flatnonzero(use_price_ok)
+    if len(priced) and not df_expedia.empty and has_amounts:
+        groups = pd.Series(priced).groupby(ota_nos[priced], sort=False).indices
+        refs = list(groups)
+        totals = np.array([use_price[priced[groups[ref]]].sum() for ref in refs], dtype=np.int64)
+        net, net_ok, net_lines = expedia.net_lookup(refs)
+        hit = net_ok[:, 0] & (np.abs(net[:, 0] - totals) <= tolerance)
+        for k in np.flatnonzero(hit):
+            rows = priced[groups[refs[k]]]
+            if len(rows) > 1 or net_lines[k] > 1:
+                lines = expedia.valid_lines(refs[k])
+                for i in rows:
+                    net_matched[i] = lines
+
+    # 행별 같은 예약번호의 가장 가까운 처리금액 (허용 오차 이내)을 한 번에 조회
+    row_lines, _ = tolerance_join(expedia, ota_nos, use_price, tolerance, use_price_ok)
+    assigned = assign_by_key(expedia, ota_nos, [i for i in priced if i not in net_matched], use_price[:, None],
+                             use_price_ok[:, None], tolerance, row_lines)
+
+    for i in range(len(df_rows)):
+        ws_row = int(ws_rows[i])
+        name = names[i]
+        ota_no = ota_nos[i]
+        if not use_price_ok[i] or df_expedia.empty:
+            results.append(RowResult(ws_row, '익스피디아', name, None, STATUS_SKIPPED))
             continue
+        price = int(use_price[i])
 
-print("\n[3단계] 예약번호 기준 그룹 합산 매칭 시작")
-used_booking_refs = set()
-group_matched_count = 0
-matched_rows = set()
-
-for ref_no, rows in booking_grouped_by_ref.items():
-    total_price = sum(price for _, price, _ in rows)
-    found = False
-    
-    customer_names = ', '.join(set(name for _, _, name in rows))
-    print(f"\n예약번호: {ref_no} (고객명: {customer_names})")
-    print(f"  전체고객목록 행 수: {len(rows)}, 가격 합계: {total_price}")
-    print(f"  부킹 데이터 가격: {booking_by_ref.get(ref_no, 'N/A')}")
-    print(f"  부킹 데이터 가격: {booking_by_ref.get(ref_no, 'N/A')}")
-    
-    if ref_no in booking_by_ref and round(total_price) == booking_by_ref[ref_no]:
-        found = True
-        used_booking_refs.add(ref_no)
-        print(f"  [OK] 예약번호 그룹 합산 매칭 성공! (전체고객목록 합계: {total_price} = 부킹 가격: {booking_by_ref[ref_no]})")
-    
-    if found:
-        group_matched_count += 1
-        for idx, _, _ in rows:
-            matched_rows.add(idx)
-            for cell in ws[idx+2]:
-                cell.fill = fill_yellow
-        print(f"  → {len(rows)}개 행 모두 노란색 표시")
-    else:
-        print(f"  [SKIP] 예약번호 그룹 합산 매칭 실패")
+        # 익스피디아 CSV에서 예약번호 검색
+        pos = expedia.rows_by_key.get(ota_no, [])
 
-print(f"\n[완료] 예약번호 기준 그룹 합산 매칭: {group_matched_count}건, {len(matched_rows)}개 행 처리됨")
+        say(f"  행 {ws_row}: OTA번호={ota_no}, 가격={price}, 익스피디아매칭={len(pos)}건")
 
-# 4단계: 매칭되지 않은 행에 대해 개별 행 매칭
-print("\n[4단계] 개별 행 매칭 시작 (그룹 합산 실패한 행만)")
-for name, rows in booking_grouped_rows.items():
-    for idx, _ in rows:
-        if idx in matched_rows:
+        if len(pos) == 0:
+            # 익스피디아 CSV에 예약번호 없음 -> 파란색
+            say(f"    → 익스피디아 데이터에 예약번호 없음 (파란색 표시)")
+            results.append(RowResult(ws_row, '익스피디아', name, price, STATUS_NOT_FOUND))
+            # 비교로그에 기록
+            log_entries.append([name, ws_row, price, '익스피디아 데이터 없음', '', '', ''])
+            expedia_notfound_count += 1
             continue
-        
-        row = df_all.iloc[idx]
-        vendor = str(row.get('거래처', '')).strip()
-        if vendor != '부킹닷컴':
+
+        valid = expedia.amount_valid[pos, 0] if has_amounts else np.zeros(len(pos), dtype=bool)
+        amounts = expedia.amounts[pos, 0] if has_amounts else np.zeros(len(pos), dtype=np.int64)
+        price_diff = np.abs(amounts - price)
+        say(f"    익스피디아가격={amounts[valid].tolist()}, 전체고객목록가격={price}, 차이={price_diff[valid].tolist()}")
+
+        if i in net_matched:
+            results.append(RowResult(ws_row, '익스피디아', name, price, STATUS_MATCHED,
+                                     [statement_id(expedia.file_map, line) for line in net_matched[i]]))
+            say(f"    [OK] 예약번호 순액 매칭 성공! (익스피디아 {len(net_matched[i])}행 합계) → 노란색 표시")
+            expedia_matched_count += 1
             continue
-        
-        ws_row = idx + 2
-        name = str(row.get(col_name_all, '')).strip()
-        ota_no = str(row.get(col_ota_no, '')).strip()[:10]
-        price1 = str(row.get(col_price_all_1, '')).replace(',', '').strip()
-        price2 = str(row.get(col_price_all_2, '')).replace(',', '').strip()
-        
-        try:
-            price1_f = float(price1)
-        except:
-            price1_f = None
-        try:
-            price2_f = float(price2)
-        except:
-            price2_f = None
-        
-        use_price = price2_f if price2_f else price1_f
-        if use_price is None:
+        if assigned[i] >= 0:
+            line = assigned[i]
+            results.append(RowResult(ws_row, '익스피디아', name, price, STATUS_MATCHED, [statement_id(expedia.file_map, line)]))
+            say(f"    [OK] 매칭 성공! (오차 {abs(int(expedia.amounts[line, 0]) - price)}원) → 노란색 표시")
+            expedia_matched_count += 1
             continue
-        
-        if df_booking.empty:
+
+        results.append(RowResult(ws_row, '익스피디아', name, price, STATUS_MISMATCH))
+        if row_lines[i] >= 0:
+            say(f"    [ERROR] 허용 오차 이내 익스피디아 행이 다른 행에 이미 매칭됨 - 빨간색 표시 + 비교로그 기록")
+        else:
+            say(f"    [ERROR] 불일치 - 빨간색 표시 + 비교로그 기록")
+        expedia_mismatch_count += 1
+        if valid.any():
+            line = row_lines[i] if row_lines[i] >= 0 else pos[np.argmax(valid)]
+            expedia_file_name, file_row = source_row(expedia.file_map, line)
+            log_entries.append([name, ws_row, price, expedia_file_name or '익스피디아파일', file_row, str(expedia.amounts[line, 0]), str(expedia.amounts[line, 0])])
+        else:
+            log_entries.append([name, ws_row, price, '-', '-', '불일치', '-'])
+
+    say(f"\n[완료] 익스피디아 비교 완료")
+    say(f"  ✅ 매칭 성공: {expedia_matched_count}건")
+    say(f"  ❌ 가격 불일치: {expedia_mismatch_count}건")
+    say(f"  🔵 예약번호 없음: {expedia_notfound_count}건")
+    say("="*80)
+    return results, log_entries
+
+
+# 거래처별 매칭 단계 (서로 다른 행/명세서만 다루므로 독립적으로 실행 가능)
+MATCHERS = {'아고다': match_agoda, '부킹닷컴': match_booking, '익스피디아': match_expedia}
+
+
+def run_match_stage(vendor, df_rows, statement_set, verbose=True, reserved_keys=()):
+    """
+    거래처 하나의 매칭 단계 (별도 프로세스에서도 실행 가능)
+
+    Returns:
+        (RowResult 목록, 비교로그 행 목록, 진행 메시지 목록) - 메시지는 바로 출력하지 않고 병합 때 순서대로 출력
+    """
+    messages = []
+    kwargs = {'reserved_keys': reserved_keys} if vendor == '아고다' else {}
+    ota_rows, ota_log = MATCHERS[vendor](df_rows, statement_set, messages.append if verbose else _silent, **kwargs)
+    return ota_rows, ota_log, messages
+
+
+# ---- 증분 비교 (바뀐 매칭 그룹만 다시 비교) ----
+
+STATE_VERSION = 3  # 매칭 로직이 바뀌면 올림 (저장된 결과 무효화)
+
+
+def match_settings():
+    """매칭 결과에 영향을 주는 설정의 fingerprint (다르면 저장된 결과 전체 무시)"""
+    settings = (STATE_VERSION, AMOUNT_POLICY, AGODA_NAME_THRESHOLD, AGODA_SUBSET_MAX_ITEMS, AGODA_SUBSET_TIME_BUDGET)
+    return hashlib.sha1(repr(settings).encode('utf-8')).hexdigest()
+
+
+NULL_GROUP = '(키 없음)'  # 예약번호가 빈 행의 매칭 그룹 (명세서 키 없음)
+
+
+def match_groups(vendor, df_rows, stmts):
+    """
+    결과가 그룹 안의 행과 그룹의 명세서 키에만 달린 매칭 단위
+
+    - 부킹닷컴: 예약번호 앞 10자리, 익스피디아: 예약번호
+    - 아고다: Remittances에 같은 이름이 있는 고객은 이름별, 나머지(유사 이름/없음)는 모두 한 그룹
+      (유사 이름은 다른 이름의 Remittances 행에 달려 있으므로 같은 이름이 없는 Remittances 이름 전체를 같이 봄)
+
+    키가 비어 있는(NaN) 행도 빠지지 않도록 dropna=False로 묶음 (예약번호가 없으면 NULL_GROUP 한 그룹)
+
+    Returns:
+        {그룹: (df_rows 안의 행 위치 배열, 명세서 키 목록)}
+    """
+    groups = {}
+    if vendor == '아고다':
+        others = []
+        for name, rows in df_rows.groupby('name', sort=False, dropna=False).indices.items():
+            if not pd.isna(name) and name in stmts.rows_by_key:
+                groups['=' + name] = (rows, [name])
+            else:
+                others.append(rows)
+        if others:
+            exact = {key[1:] for key in groups}
+            groups['~'] = (np.sort(np.concatenate(others)), sorted(k for k in stmts.rows_by_key if k not in exact))
+        return groups
+    keys = df_rows['ota_no'].str[:10] if vendor == '부킹닷컴' else df_rows['ota_no']
+    for key, rows in pd.Series(np.arange(len(df_rows))).groupby(keys.to_numpy(), sort=False, dropna=False).indices.items():
+        groups[NULL_GROUP if pd.isna(key) else key] = (rows, [] if pd.isna(key) else [key])
+    return groups
+
+
+FINGERPRINT_COLUMNS = ['ws_row', 'name', 'ota_no', 'price1_won', 'price2_won', 'use_price']
+
+
+def row_hashes(df_rows):
+    """전체고객 목록 행마다 입력 해시 (uint64, 한 번에 계산)"""
+    return pd.util.hash_pandas_object(df_rows[FINGERPRINT_COLUMNS], index=False).to_numpy()
+
+
+def line_hashes(stmts):
+    """명세서 행마다 (키, 파일명, 파일 내 행번호, 금액, 금액 유효 여부) 해시 (uint64, 한 번에 계산)"""
+    n = len(stmts.df)
+    if n == 0 or stmts.key_col is None:
+        return np.zeros(n, dtype=np.uint64)
+    file_idx = np.repeat(np.arange(len(stmts.file_map)), [count for _, _, count in stmts.file_map])
+    offsets = np.array([offset for _, offset, _ in stmts.file_map], dtype=np.int64)
+    frame = pd.DataFrame({
+        'key': stmts.df[stmts.key_col].astype(object).to_numpy(),
+        'file': np.array([f for f, _, _ in stmts.file_map], dtype=object)[file_idx],
+        'row': np.arange(n) - offsets[file_idx] + 2,
+    })
+    for c in range(stmts.amounts.shape[1]):
+        frame[f'amount_{c}'] = stmts.amounts[:, c]
+        frame[f'valid_{c}'] = stmts.amount_valid[:, c]
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def group_fingerprint(row_hash, rows, line_hash, stmts, keys):
+    """그룹 입력(전체고객 목록 행 + 명세서 키의 모든 행/금액)의 SHA-1 - 행/명세서 행 해시는 미리 계산한 것을 이어 붙임"""
+    h = hashlib.sha1(row_hash[np.sort(rows)].tobytes())
+    for key in keys:
+        h.update(repr(key).encode('utf-8'))
+        h.update(line_hash[np.asarray(stmts.rows_by_key.get(key, []), dtype=np.int64)].tobytes())
+    return h.hexdigest()
+
+
+def plan_stage(vendor, df_rows, stmts, state):
+    """
+    저장된 결과와 비교해 다시 비교할 행만 고름
+
+    Returns:
+        (다시 비교할 df_rows 부분, {재사용 그룹: 저장된 결과}, {다시 비교할 그룹: fingerprint}, {엑셀 행번호: 그룹})
+    """
+    reused = {}
+    fresh = {}
+    group_of_row = {}
+    changed_rows = []
+    ws_rows = df_rows['ws_row'].to_numpy()
+    row_hash = row_hashes(df_rows)
+    line_hash = line_hashes(stmts)
+    for group, (rows, keys) in match_groups(vendor, df_rows, stmts).items():
+        fingerprint = group_fingerprint(row_hash, rows, line_hash, stmts, keys)
+        entry = state.get(vendor, group, fingerprint)
+        if entry is not None:
+            reused[group] = entry
             continue
-        
-        booking_match = df_booking[df_booking[df_booking.columns[1]] == ota_no]
-        
-        print(f"  행 {ws_row}: OTA번호={ota_no}, 가격={use_price}, 부킹매칭={len(booking_match)}건")
-        
-        if booking_match.empty:
-            print(f"    → 부킹 데이터에 예약번호 없음 (파란색 표시)")
-            for cell in ws[ws_row]:
-                cell.fill = fill_blue
-            # 비교로그에 기록
-            log_ws.append([name, ws_row, use_price, '부킹닷컴 데이터 없음', '', '', ''])
+        fresh[group] = fingerprint
+        changed_rows.append(rows)
+        for ws_row in ws_rows[rows]:
+            group_of_row[int(ws_row)] = group
+    positions = np.sort(np.concatenate(changed_rows)) if changed_rows else np.array([], dtype=np.int64)
+    return df_rows.iloc[positions], reused, fresh, group_of_row
+
+
+def row_style(r):
+    """RowResult → (배경, 글씨). None이면 기존 서식 유지"""
+    # 익스피디아는 이전 실행의 글씨색/배경색을 초기화
+    reset = r.ota == '익스피디아'
+    if r.status == STATUS_MATCHED:
+        return fill_yellow, (font_default if reset else None)
+    if r.status == STATUS_NOT_FOUND:
+        return fill_blue, None
+    if r.status == STATUS_MISMATCH:
+        return (fill_none if reset else None), font_red
+    return None, None
+
+
+def populated_columns(ws):
+    """헤더(1행)에서 값이 있는 마지막 열 번호 (헤더가 비어 있으면 시트 전체 최대 열)"""
+    header = [c.column for c in next(ws.iter_rows(min_row=1, max_row=1), ()) if c.value is not None]
+    return max(header) if header else ws.max_column
+
+
+def apply_row_styles(ws, styles_by_row):
+    """
+    행 단위 색상 일괄 적용
+
+    - 배경/글씨 스타일은 통합문서 스타일 테이블에 한 번만 등록하고, 셀에는 스타일 번호만 기록 (openpyxl 3.1.5 내부 구조 기준)
+    - 같은 스타일이 연속된 행은 한 구간으로 묶어 iter_rows로 처리 (ws[행번호]는 호출마다 max_column을 다시 계산함)
+    - 헤더 기준 사용 중인 열까지만 처리
+
+    Args:
+        ws: 결과 시트
+        styles_by_row: {엑셀 행번호: (배경 PatternFill 또는 None, 글씨 Font 또는 None)}
+    """
+    wb = ws.parent
+    max_col = populated_columns(ws)
+    style_ids = {}
+
+    # wb._fills/_fonts, cell._style, StyleArray는 openpyxl 내부 구현 (3.1.5에서 확인).
+    # 공개 API(cell.fill/cell.font)는 대입마다 Fill/Font 전체를 해시해 3만 행 기준 약 13배 느림.
+    # 내부 구조가 바뀐 버전이면 공개 API로 처리
+    if StyleArray is None or not (hasattr(wb, '_fills') and hasattr(wb, '_fonts')):
+        for ws_row, (fill, font) in styles_by_row.items():
+            for row in ws.iter_rows(min_row=ws_row, max_row=ws_row, max_col=max_col):
+                for cell in row:
+                    if fill is not None:
+                        cell.fill = fill
+                    if font is not None:
+                        cell.font = font
+        return
+
+    def register(fill, font):
+        key = (id(fill), id(font))
+        if key not in style_ids:
+            style_ids[key] = (wb._fills.add(fill) if fill is not None else None,
+                              wb._fonts.add(font) if font is not None else None)
+        return style_ids[key]
+
+    runs = []  # [시작행, 끝행, 배경, 글씨]
+    for ws_row in sorted(styles_by_row):
+        fill, font = styles_by_row[ws_row]
+        if fill is None and font is None:
             continue
-        
-        price_match = False
-        log_info = None
-        
-        for b_idx, b_row in booking_match.iterrows():
-            try:
-                if booking_price_col and booking_price_col in df_booking.columns:
-                    booking_price = float(str(b_row[booking_price_col]).replace(',', '').strip())
-                else:
-                    booking_price = float(str(b_row.iloc[8]).replace(',', '').strip())
-                
-                booking_price_adjusted = round(booking_price * 0.82)
-                
-                print(f"    부킹원가={booking_price}, 조정가격(×0.82)={booking_price_adjusted}, 비교={round(use_price)}")
-                
-                if round(use_price) == booking_price_adjusted:
-                    price_match = True
-                    matched_booking_refs[ota_no] = matched_booking_refs.get(ota_no, 0) + 1
-                    print(f"    [OK] 개별 행 매칭 성공!")
-                    break
+        if runs and runs[-1][1] == ws_row - 1 and runs[-1][2] is fill and runs[-1][3] is font:
+            runs[-1][1] = ws_row
+        else:
+            runs.append([ws_row, ws_row, fill, font])
+
+    for start, end, fill, font in runs:
+        fill_id, font_id = register(fill, font)
+        for row in ws.iter_rows(min_row=start, max_row=end, max_col=max_col):
+            for cell in row:
+                if cell._style is None:
+                    cell._style = StyleArray()
+                if fill_id is not None:
+                    cell._style.fillId = fill_id
+                if font_id is not None:
+                    cell._style.fontId = font_id
+
+
+def apply_conditional_styles(ws, result):
+    """
+    조건부 서식 모드: 숨김 상태 열(STATUS_COLUMN) + 시트 전체에 조건부 서식 규칙 3개
+
+    셀마다 서식을 쓰지 않으므로 행이 늘어도 styles 파트 크기와 저장 시간이 거의 일정.
+    기존 셀 서식은 건드리지 않음 (익스피디아 행의 이전 배경/글씨 초기화도 하지 않음)
+    """
+    header = {c.value: c.column for c in next(ws.iter_rows(min_row=1, max_row=1), ()) if c.value is not None}
+    status_col = header.get(STATUS_COLUMN)
+    if status_col is None:
+        status_col = populated_columns(ws) + 1
+        ws.cell(row=1, column=status_col).value = STATUS_COLUMN
+    else:
+        # 이전 실행의 상태 값 지우기
+        for (cell,) in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=status_col, max_col=status_col):
+            cell.value = None
+    letter = get_column_letter(status_col)
+    ws.column_dimensions[letter].hidden = True
+
+    for r in result.rows:
+        if r.status in (STATUS_MATCHED, STATUS_NOT_FOUND, STATUS_MISMATCH):
+            ws.cell(row=r.ws_row, column=status_col).value = r.status
+
+    # 이전 실행에서 추가한 규칙(상태 열 참조)만 제거하고 나머지 조건부 서식은 유지
+    marker = f'${letter}2='
+    rules = ConditionalFormattingList()
+    for cf in ws.conditional_formatting:
+        for rule in cf.rules:
+            if not any(marker in f for f in (rule.formula or [])):
+                rules.add(str(cf.sqref), rule)
+    ws.conditional_formatting = rules
+
+    last_col = get_column_letter(max(status_col - 1, 1))
+    cf_range = f'A2:{last_col}{max(ws.max_row, 2)}'
+    ws.conditional_formatting.add(cf_range, FormulaRule(formula=[f'{marker}"{STATUS_MATCHED}"'], fill=fill_yellow, stopIfTrue=True))
+    ws.conditional_formatting.add(cf_range, FormulaRule(formula=[f'{marker}"{STATUS_NOT_FOUND}"'], fill=fill_blue, stopIfTrue=True))
+    ws.conditional_formatting.add(cf_range, FormulaRule(formula=[f'{marker}"{STATUS_MISMATCH}"'], font=font_red, stopIfTrue=True))
+
+
+def changed_row_styles(ws, styles_by_row):
+    """styles_by_row 중 첫 열의 현재 배경/글씨와 다른 행만 (None인 쪽은 비교하지 않음)"""
+    changed = {}
+    for ws_row, (fill, font) in styles_by_row.items():
+        if fill is None and font is None:
+            continue
+        cell = ws.cell(row=ws_row, column=1)
+        if (fill is not None and cell.fill != fill) or (font is not None and cell.font != font):
+            changed[ws_row] = (fill, font)
+    return changed
+
+
+def status_column_changed(ws, result):
+    """조건부 서식 모드: 숨김 상태 열의 기존 값과 이번 상태가 다르면 True (상태 열이 없어도 True)"""
+    header = {c.value: c.column for c in next(ws.iter_rows(min_row=1, max_row=1), ()) if c.value is not None}
+    status_col = header.get(STATUS_COLUMN)
+    if status_col is None:
+        return True
+    current = {}
+    for (cell,) in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=status_col, max_col=status_col):
+        if cell.value is not None:
+            current[cell.row] = cell.value
+    wanted = {r.ws_row: r.status for r in result.rows
+              if r.status in (STATUS_MATCHED, STATUS_NOT_FOUND, STATUS_MISMATCH)}
+    return current != wanted
+
+
+def log_key(entry):
+    """비교로그 한 줄 → 비교용 튜플 (빈 문자열/NaN = 빈 셀, 끝의 빈 셀 제거)"""
+    values = [None if v is None or v == '' or (isinstance(v, float) and v != v) else v for v in entry]
+    while values and values[-1] is None:
+        values.pop()
+    return tuple(values)
+
+
+def read_log_entries(ws):
+    """비교로그 시트 → (헤더, [줄, ...]) (log_key로 정규화)"""
+    rows = ws.iter_rows(values_only=True)
+    header = log_key(next(rows, ()))
+    return header, [log_key(row) for row in rows]
+
+
+def log_changes(existing, result):
+    """
+    기존 비교로그와 이번 비교로그 차이
+
+    Args:
+        existing: read_log_entries() 결과 또는 None(비교로그 없음)
+
+    Returns:
+        (추가된 줄 수, 없어진 줄 수, 순서/헤더만 달라도 True인 변경 여부)
+    """
+    new_entries = [log_key(entry) for entry in result.log_entries]
+    if existing is None:
+        return len(new_entries), 0, True
+    header, old_entries = existing
+    added = Counter(new_entries) - Counter(old_entries)
+    removed = Counter(old_entries) - Counter(new_entries)
+    changed = header != log_key(LOG_HEADER) or old_entries != new_entries
+    return sum(added.values()), sum(removed.values()), changed
+
+
+def style_label(fill, font):
+    if fill is fill_yellow:
+        return '노란색'
+    if fill is fill_blue:
+        return '파란색'
+    if font is font_red:
+        return '빨간 글씨'
+    return '초기화'
+
+
+def write_result_workbook(result, source, output_path, style_mode=STYLE_FILL, log_output=LOG_SHEET,
+                          diff_only=False, say=print, profiler=None):
+    """
+    비교 결과를 엑셀에 반영: 첫 시트 행 색상 + 비교로그 시트 재작성
+
+    Args:
+        result: ReconcileResult
+        source: 원본 전체고객 목록 경로 또는 이미 연 Workbook (스타일/서식 유지용)
+        output_path: 저장 경로 (source_path와 같아도 됨)
+        style_mode: STYLE_FILL(셀마다 배경/글씨 지정) 또는 STYLE_CONDITIONAL(숨김 상태 열 + 조건부 서식)
+        log_output: LOG_SHEET(결과 파일의 비교로그 시트) 또는 LOG_SIDECAR(별도 _비교로그.xlsx + 거래처별 상세 시트)
+        diff_only: True면 source(=기존 결과 파일)와 비교해 색상/비교로그가 바뀐 부분만 쓰고,
+            바뀐 것이 없으면 저장하지 않음 (변경 요약 출력)
+        profiler: StageProfiler (색상 반영/비교로그/저장 단계 시간 기록)
+
+    Returns:
+        결과 파일을 저장했으면 True
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    wb = source if isinstance(source, Workbook) else load_workbook(source)
+    ws = wb.worksheets[0]
+    sidecar_path = log_workbook_path(output_path)
+    n_log = len(result.log_entries)
+
+    styles = {r.ws_row: row_style(r) for r in result.rows}
+    if not diff_only:
+        with profiler.stage('색상 반영', len(styles)):
+            if style_mode == STYLE_CONDITIONAL:
+                apply_conditional_styles(ws, result)
+            else:
+                apply_row_styles(ws, styles)
+        with profiler.stage('비교로그 시트', n_log if log_output == LOG_SHEET else 0):
+            if '비교로그' in wb.sheetnames:
+                del wb['비교로그']
+            if log_output == LOG_SHEET:
+                write_log_sheet(wb, result)
+        with profiler.stage('결과 파일 저장', ws.max_row):
+            wb.save(output_path)
+        if log_output == LOG_SIDECAR:
+            with profiler.stage('별도 비교로그 저장', n_log + len(result.rows)):
+                write_log_workbook(result, sidecar_path)
+        return True
+
+    # ---- 바뀐 부분만 반영 ----
+    summary = []
+    with profiler.stage('색상 비교/반영', len(styles)):
+        if style_mode == STYLE_CONDITIONAL:
+            styles_changed = status_column_changed(ws, result)
+            if styles_changed:
+                apply_conditional_styles(ws, result)
+                summary.append('상태 열 갱신')
+        else:
+            changed = changed_row_styles(ws, styles)
+            styles_changed = bool(changed)
+            if changed:
+                apply_row_styles(ws, changed)
+                counts = Counter(style_label(fill, font) for fill, font in changed.values())
+                summary.append(f"색상 {len(changed)}행 ({', '.join(f'{k} {v}' for k, v in counts.items())})")
+
+    with profiler.stage('비교로그 비교', n_log):
+        if log_output == LOG_SHEET:
+            existing = read_log_entries(wb['비교로그']) if '비교로그' in wb.sheetnames else None
+        elif os.path.exists(sidecar_path):
+            log_wb = load_workbook(sidecar_path, read_only=True)
+            existing = read_log_entries(log_wb['비교로그']) if '비교로그' in log_wb.sheetnames else None
+            log_wb.close()
+        else:
+            existing = None
+        added, removed, log_changed = log_changes(existing, result)
+    if log_changed:
+        summary.append(f'비교로그 +{added}/-{removed}')
+
+    # 결과 파일: 색상이 바뀌었거나, 비교로그 시트를 다시 써야 하거나(시트 모드), 지워야 할 때(별도 파일 모드)
+    stale_sheet = log_output == LOG_SIDECAR and '비교로그' in wb.sheetnames
+    save_workbook = styles_changed or stale_sheet or (log_output == LOG_SHEET and log_changed)
+    if save_workbook:
+        with profiler.stage('결과 파일 저장', ws.max_row):
+            if log_output == LOG_SHEET and log_changed or stale_sheet:
+                if '비교로그' in wb.sheetnames:
+                    del wb['비교로그']
+                if log_output == LOG_SHEET:
+                    write_log_sheet(wb, result)
+            wb.save(output_path)
+    if log_output == LOG_SIDECAR and (styles_changed or log_changed):
+        with profiler.stage('별도 비교로그 저장', n_log + len(result.rows)):
+            write_log_workbook(result, sidecar_path)
+
+    if summary:
+        say(f"[변경] {', '.join(summary)}" + ('' if save_workbook else ' - 결과 파일은 그대로'))
+    else:
+        say('[변경 없음] 색상/비교로그가 이전 결과와 같아 저장하지 않음')
+    return save_workbook
+
+
+def write_log_sheet(wb, result):
+    """결과 통합문서에 비교로그 시트 추가"""
+    log_ws = wb.create_sheet('비교로그')
+    log_ws.append(LOG_HEADER)
+    for entry in result.log_entries:
+        log_ws.append(entry)
+
+
+def log_workbook_path(output_path):
+    """별도 비교로그 파일 경로 (예: 매출_검토_결과.xlsx → 매출_검토_결과_비교로그.xlsx)"""
+    return os.path.splitext(output_path)[0] + '_비교로그.xlsx'
+
+
+def write_log_workbook(result, path):
+    """
+    비교로그 + 거래처별 상세 시트를 write-only 모드로 스트리밍 저장
+
+    상세 시트: 전체고객 목록 행마다 상태와 매칭된 명세서 행
+    """
+    wb = Workbook(write_only=True)
+    log_ws = wb.create_sheet('비교로그')
+    log_ws.append(LOG_HEADER)
+    for entry in result.log_entries:
+        log_ws.append(entry)
+
+    rows_by_ota = defaultdict(list)
+    for r in result.rows:
+        rows_by_ota[r.ota].append(r)
+    for ota in ('아고다', '부킹닷컴', '익스피디아'):
+        detail_ws = wb.create_sheet(ota)
+        detail_ws.append(DETAIL_HEADER)
+        for r in sorted(rows_by_ota.get(ota, []), key=lambda r: r.ws_row):
+            detail_ws.append([r.ws_row, r.name, r.price, r.status, ', '.join(r.statement_ids), r.name_score])
+    wb.save(path)
+
+
+def reconcile(customer_list, statements_dir=directory_ota, output_path=None, cache_dir=DEFAULT_CACHE_DIR, verbose=True,
+              style_mode=STYLE_FILL, log_output=LOG_SHEET, statements=None, parallel=False, incremental=False,
+              diff_only=False, profiler=None):
+    """
+    전체고객 목록과 OTA 명세서 비교
+
+    Args:
+        customer_list: 전체고객 목록 또는 매출_검토_결과.xlsx 경로
+        statements_dir: 명세서 폴더 (기본값: ota-adjustment)
+        output_path: 지정하면 색상/비교로그를 반영한 결과 엑셀 저장 (customer_list와 달라도 됨)
+        cache_dir: 명세서 파싱 캐시 폴더 (None이면 캐시 사용 안 함)
+        verbose: 진행 상황 출력 여부
+        style_mode: 결과 엑셀 색상 방식 (STYLE_FILL 또는 STYLE_CONDITIONAL)
+        log_output: 비교로그 저장 위치 (LOG_SHEET 또는 LOG_SIDECAR)
+        statements: 이미 읽은 load_statement_sets() 결과 (지정하면 statements_dir/cache_dir 무시, 여러 달 비교용)
+        parallel: True면 거래처별 매칭을 별도 프로세스에서 동시에 실행 (결과/출력 순서는 같음)
+        incremental: True면 cache_dir에 저장된 이전 매칭 결과 중 입력이 그대로인 그룹은 다시 비교하지 않음 (MatchStateStore).
+            그룹 fingerprint 계산/결과 저장 비용이 매칭 시간과 비슷해 기본값은 False (전체 다시 비교)
+        diff_only: True면 기존 결과 파일의 색상/비교로그와 비교해 바뀐 행만 쓰고, 바뀐 것이 없으면 저장 생략
+            (customer_list와 output_path가 같은 파일일 때만 적용, 다르면 전체 저장)
+        profiler: StageProfiler - 지정하면 단계별(엑셀 읽기/명세서 읽기/증분 계획/거래처별 매칭/색상/저장) 시간과 행 수 기록
+
+    Returns:
+        ReconcileResult
+    """
+    say = print if verbose else _silent
+    profiler = profiler or StageProfiler(enabled=False)
+
+    # 결과를 저장할 때만 openpyxl로 열고, 같은 통합문서에서 데이터도 만듦 (한 번만 파싱)
+    with profiler.stage('전체고객 목록 읽기') as st:
+        wb = load_workbook(customer_list) if output_path else None
+        df_all = load_customer_list(wb if wb is not None else customer_list)
+        st.rows = len(df_all)
+    if statements is None:
+        with profiler.stage('명세서 읽기') as st:
+            cache = StatementCache(cache_dir) if cache_dir else None
+            statements = load_statement_sets(statements_dir, cache, say)
+            st.rows = sum(len(s.df) for s in statements.values())
+
+    with profiler.stage('거래처 분류/증분 계획', len(df_all)):
+        vendor_frames = split_by_vendor(df_all)
+        # 결과 파일 기준으로 저장 (다음 실행에서는 결과 파일이 원본이 됨)
+        state = MatchStateStore(cache_dir, output_path or customer_list, match_settings()) if cache_dir and incremental else None
+
+        stage_args = []
+        plans = {}
+        for vendor in MATCHERS:
+            df_rows = vendor_frames.get(vendor, df_all.iloc[0:0])
+            reserved = ()
+            if state is not None:
+                plans[vendor] = plan_stage(vendor, df_rows, statements[vendor], state)
+                if vendor == '아고다':
+                    reserved = set(df_rows['name']) & set(statements[vendor].rows_by_key)
+                df_rows = plans[vendor][0]
+            stage_args.append((vendor, df_rows, statements[vendor], verbose, reserved))
+    if parallel:
+        from concurrent.futures import ProcessPoolExecutor
+        # 거래처별 매칭은 작업 프로세스에서 실행되므로 전체 시간만 기록 (cProfile도 이 프로세스 부분만)
+        with profiler.stage('매칭 (병렬)', sum(len(a[1]) for a in stage_args)):
+            with ProcessPoolExecutor(max_workers=len(stage_args)) as pool:
+                stages = list(pool.map(run_match_stage, *zip(*stage_args)))
+    else:
+        stages = []
+        for a in stage_args:
+            with profiler.stage(f'매칭 {a[0]}', len(a[1])):
+                stages.append(run_match_stage(*a))
+
+    # 병합: 항상 아고다 → 부킹닷컴 → 익스피디아 순서, 거래처 안에서는 엑셀 행 순서 (진행 메시지/비교로그/상태 순서 고정)
+    with profiler.stage('결과 병합/매칭 결과 저장') as st:
+        rows = []
+        log_entries = []
+        for vendor, (ota_rows, ota_log, messages) in zip(MATCHERS, stages):
+            for message in messages:
+                say(message)
+            if state is not None:
+                _, reused, fresh, group_of_row = plans[vendor]
+                entries = {group: {'fingerprint': fingerprint, 'rows': [], 'log': []} for group, fingerprint in fresh.items()}
+                for r in ota_rows:
+                    entries[group_of_row[r.ws_row]]['rows'].append(asdict(r))
+                for entry in ota_log:
+                    entries[group_of_row[entry[1]]]['log'].append(entry)
+                for entry in reused.values():
+                    ota_rows.extend(RowResult(**r) for r in entry['rows'])
+                    ota_log.extend(entry['log'])
+                # 전체 비교는 거래처 행마다 결과 하나 → 증분 결과가 모자라거나 남으면(그룹에서 빠진 행 등) 이 거래처만 전체 다시 비교
+                expected = len(vendor_frames.get(vendor, ()))
+                if len(ota_rows) != expected:
+                    say(f"[증분] {vendor}: 결과 {len(ota_rows)}행 ≠ 전체 {expected}행, 저장된 결과 버리고 전체 다시 비교")
+                    ota_rows, ota_log, messages = run_match_stage(vendor, vendor_frames[vendor], statements[vendor], verbose)
+                    for message in messages:
+                        say(message)
+                    state.replace(vendor, {})
+                    reused = {}
                 else:
-                    if log_info is None:
-                        booking_file_name = booking_files[0] if booking_files else '부킹파일'
-                        log_info = [name, ws_row, use_price, booking_file_name, b_idx+2, str(booking_price_adjusted), str(booking_price)]
+                    state.replace(vendor, {**reused, **entries})
+                if reused:
+                    say(f"[증분] {vendor}: 매칭 그룹 {len(reused) + len(fresh)}개 중 {len(reused)}개 이전 결과 사용, {len(fresh)}개 다시 비교")
+            rows.extend(sorted(ota_rows, key=lambda r: r.ws_row))
+            log_entries.extend(sorted(ota_log, key=lambda entry: entry[1]))
+        if state is not None:
+            state.save()
+        st.rows = len(rows)
+
+    result = ReconcileResult(customer_list, rows, log_entries)
+    if output_path:
+        diff_only = diff_only and os.path.abspath(customer_list) == os.path.abspath(output_path)
+        if write_result_workbook(result, wb, output_path, style_mode, log_output, diff_only, say, profiler):
+            say(f'완료: {output_path}에 저장됨')
+    return result
+
+
+# ---- 여러 달 일괄 비교 ----
+
+# 작업 프로세스마다 한 번만 받아두는 명세서 (initializer로 전달, 달마다 다시 보내지 않음)
+_batch_statements = None
+
+
+def _init_batch_worker(statements):
+    global _batch_statements
+    _batch_statements = statements
+
+
+def _reconcile_month(source, output_path, style_mode, log_output, cache_dir, incremental):
+    # 명세서는 이미 받아 두었으므로 cache_dir은 매칭 결과 저장소(MatchStateStore)에만 쓰임
+    result = reconcile(source, output_path=output_path, cache_dir=cache_dir, verbose=False, style_mode=style_mode,
+                       log_output=log_output, statements=_batch_statements, incremental=incremental)
+    return result.counts()
+
+
+def month_of(path):
+    """'전체고객 목록_202511.xlsx' → '202511' (없으면 None)"""
+    m = re.search(r'(\d{6})', os.path.basename(path))
+    return m.group(1) if m else None
+
+
+def batch_output_path(month, output_dir, with_year=False):
+    # 매출검토결과 폴더의 기존 이름 형식: 매출_검토_결과(11월).xlsx
+    # 여러 해의 같은 달(202412, 202512)이 같은 파일이 되지 않도록 with_year면 매출_검토_결과(2025년 12월).xlsx
+    if not re.fullmatch(r'\d{6}', str(month)):
+        raise ValueError(f'월 키는 YYYYMM 형식이어야 합니다: {month}')
+    label = f'{month[:4]}년 {int(month[4:])}월' if with_year else f'{int(month[4:])}월'
+    return os.path.join(output_dir, f'매출_검토_결과({label}).xlsx')
+
+
+def find_monthly_lists(dirs):
+    """폴더들에서 전체고객 목록_YYYYMM.xlsx를 찾아 {YYYYMM: 경로} (같은 달이 여러 곳에 있으면 앞 폴더 우선)"""
+    monthly = {}
+    for d in dirs:
+        if not os.path.isdir(d):
+            continue
+        for f in sorted(os.listdir(d)):
+            month = month_of(f)
+            if f.startswith('전체고객 목록_') and f.endswith('.xlsx') and month and month not in monthly:
+                monthly[month] = os.path.join(d, f)
+    return dict(sorted(monthly.items()))
+
+
+def reconcile_batch(customer_lists, output_dir, statements_dir=directory_ota, cache_dir=DEFAULT_CACHE_DIR,
+                    style_mode=STYLE_FILL, log_output=LOG_SHEET, workers=None, incremental=False):
+    """
+    여러 달의 전체고객 목록을 한 번에 비교 (명세서는 한 번만 읽고, 달마다 별도 프로세스에서 처리)
+
+    Args:
+        customer_lists: {YYYYMM: 전체고객 목록 경로}
+        output_dir: 결과 폴더 (달마다 매출_검토_결과(N월).xlsx, 여러 해에 걸치면 매출_검토_결과(YYYY년 N월).xlsx.
+            이미 있으면 그 파일을 원본으로 다시 비교)
+        workers: 프로세스 수 (기본값: 달 수와 CPU 수 중 작은 값)
+        cache_dir: 명세서 파싱 캐시와 달별 매칭 결과 저장 폴더 (None이면 둘 다 사용 안 함)
+        incremental: True면 달마다 저장된 매칭 결과 중 입력이 그대로인 그룹은 다시 비교하지 않음
+
+    Returns:
+        {YYYYMM: 거래처별 상태 건수}
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    cache = StatementCache(cache_dir) if cache_dir else None
+    statements = load_statement_sets(statements_dir, cache, print)
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = {}
+    with_year = len({str(month)[:4] for month in customer_lists}) > 1
+    for month, list_path in customer_lists.items():
+        output_path = batch_output_path(month, output_dir, with_year)
+        jobs[month] = (output_path if os.path.exists(output_path) else list_path, output_path)
+
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    print(f'[일괄] {len(jobs)}개월, 프로세스 {workers}개')
+    summary = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(statements,)) as pool:
+        futures = {pool.submit(_reconcile_month, source, output_path, style_mode, log_output, cache_dir, incremental): month
+                   for month, (source, output_path) in jobs.items()}
+        for future in as_completed(futures):
+            month = futures[future]
+            try:
+                summary[month] = future.result()
             except Exception as e:
-                print(f"    오류: {e}")
+                print(f'[ERROR] {month} 비교 실패: {e}')
                 continue
-        
-        if price_match:
-            for cell in ws[ws_row]:
-                cell.fill = fill_yellow
-            print(f"    → 노란색 표시")
-        else:
-            if matched_booking_refs.get(ota_no, 0) > 0:
-                matched_booking_refs[ota_no] -= 1
-                print(f"    → 이미 매칭됨 (표시 없음)")
-                continue
-            
-            for cell in ws[ws_row]:
-                cell.font = font_red
-            print(f"    [ERROR] 불일치 - 빨간색 표시 + 비교로그 기록")
-            
-            if log_info:
-                log_ws.append(log_info)
-            else:
-                log_ws.append([name, ws_row, use_price, '-', '-', '불일치', '-'])
-
-print(f"\n[완료] 부킹닷컴 비교 완료")
-print("="*80)
-
-# 익스피디아 비교 처리
-print("\n" + "="*80)
-print("익스피디아 비교 시작")
-print("="*80)
-
-matched_expedia_refs = {}
-expedia_matched_count = 0
-expedia_notfound_count = 0
-expedia_mismatch_count = 0
-
-for idx, row in df_all.iterrows():
-    vendor = str(row.get('거래처', '')).strip()
-    if vendor != '익스피디아':
-        continue
-    
-    ws_row = idx + 2
-    name = str(row.get(col_name_all, '')).strip()
-    ota_no = str(row.get(col_ota_no, '')).strip()
-    price1 = str(row.get(col_price_all_1, '')).replace(',', '').strip()
-    price2 = str(row.get(col_price_all_2, '')).replace(',', '').strip()
-    
-    try:
-        price1_f = float(price1)
-    except:
-        price1_f = None
-    try:
-        price2_f = float(price2)
-    except:
-        price2_f = None
-    
-    use_price = price2_f if price2_f else price1_f
-    if use_price is None:
-        continue
-    
-    if df_expedia.empty:
-        continue
-    
-    # 익스피디아 CSV에서 예약번호 검색
-    expedia_match = df_expedia[df_expedia[df_expedia.columns[0]] == ota_no]
-    
-    print(f"  행 {ws_row}: OTA번호={ota_no}, 가격={use_price}, 익스피디아매칭={len(expedia_match)}건")
-    
-    if expedia_match.empty:
-        # 익스피디아 CSV에 예약번호 없음 -> 파란색
-        print(f"    → 익스피디아 데이터에 예약번호 없음 (파란색 표시)")
-        for cell in ws[ws_row]:
-            cell.fill = fill_blue
-        # 비교로그에 기록
-        log_ws.append([name, ws_row, use_price, '익스피디아 데이터 없음', '', '', ''])
-        expedia_notfound_count += 1
-        continue
-    
-    price_match = False
-    log_info = None
-    
-    for e_idx, e_row in expedia_match.iterrows():
+            print(f'[일괄] {month} 완료: {jobs[month][1]} {summary[month]}')
+    return dict(sorted(summary.items()))
+
+
+def write_ratios_to_result_log(ratios, result_path=None):
+    """
+    비교로그 G열에 비율을 한 번에 기록 (파일은 한 번만 읽고 한 번만 저장)
+
+    Args:
+        ratios: {비교로그 행번호(1부터, 헤더 포함): 비율}
+        result_path: 비교로그 시트가 있는 엑셀 (기본값: 매출_검토_결과.xlsx)
+    """
+    result_path = result_path or os.path.join(dir_base, '매출_검토_결과.xlsx')
+    wb = load_workbook(result_path)
+    if '비교로그' not in wb.sheetnames:
+        print('[비교로그] 시트가 없습니다.')
+        return
+    ws = wb['비교로그']
+    for row_idx, ratio in ratios.items():
+        ws.cell(row=row_idx, column=7).value = ratio
+    wb.save(result_path)
+    print(f"[진단-비교로그] G열에 비율 {len(ratios)}건 기록 완료")
+
+
+def write_ratio_to_result_log(ratio, row_idx, result_path=None):
+    write_ratios_to_result_log({row_idx: ratio}, result_path)
+
+
+def print_peter_ludwig_log(result):
+    # print('[비교로그] Peter Ludwig 관련 행:')
+    for row in result.log_rows_containing('Peter Ludwig'):
+        print(tuple(row))
+
+
+def report_profile(profiler, output_dir):
+    """--profile: 단계별 시간 표 출력 + JSON/표 저장"""
+    print('\n[프로파일] 단계별 실행 시간')
+    print(profiler.table())
+    json_path = profiler.save(output_dir)
+    print(f'[프로파일] {json_path} 저장' + (f' (cProfile: {profiler.cprofile_dir})' if profiler.cprofile_dir else ''))
+
+
+def main(argv=None):
+    # Windows 콘솔 인코딩 문제 해결
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+    # 명령행 인자 파싱
+    parser = argparse.ArgumentParser(description='호텔 매출 비교 프로그램')
+    parser.add_argument('--download-expedia', action='store_true', help='Expedia 명세서 자동 다운로드 실행')
+    parser.add_argument('--expedia-start-date', help='Expedia 다운로드 시작 날짜 (YYYY-MM-DD)')
+    parser.add_argument('--expedia-end-date', help='Expedia 다운로드 종료 날짜 (YYYY-MM-DD)')
+    parser.add_argument('--style-mode', choices=[STYLE_FILL, STYLE_CONDITIONAL], default=STYLE_FILL,
+                        help='결과 색상 방식: fill=셀마다 배경/글씨 지정(기본), conditional=숨김 상태 열 + 조건부 서식')
+    parser.add_argument('--log-output', choices=[LOG_SHEET, LOG_SIDECAR], default=LOG_SHEET,
+                        help='비교로그 위치: sheet=결과 파일의 비교로그 시트(기본), sidecar=별도 _비교로그.xlsx(거래처별 상세 시트 포함)')
+    parser.add_argument('--parallel', action='store_true',
+                        help='아고다/부킹닷컴/익스피디아 매칭을 별도 프로세스에서 동시에 실행 (명세서가 많을 때)')
+    parser.add_argument('--batch', nargs='*', metavar='LIST',
+                        help='여러 달 일괄 비교: 전체고객 목록 파일들 (파일을 생략하면 프로젝트 폴더와 매출검토결과의 전체고객 목록_*.xlsx 전체)')
+    parser.add_argument('--batch-output', default=os.path.join(dir_base, '매출검토결과'),
+                        help='일괄 비교 결과 폴더 (기본값: 매출검토결과)')
+    parser.add_argument('--workers', type=int, help='일괄 비교 프로세스 수 (기본값: 달 수와 CPU 수 중 작은 값)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='이전 매칭 결과를 저장해 두고 입력이 바뀐 예약번호/고객만 다시 비교 (기본: 모든 행 다시 비교)')
+    parser.add_argument('--diff-only', action='store_true',
+                        help='기존 결과 파일과 비교해 색상/비교로그가 바뀐 행만 쓰고, 바뀐 것이 없으면 저장하지 않음')
+    parser.add_argument('--profile', nargs='?', const=os.path.join(dir_base, '.profile'), metavar='DIR',
+                        help='단계별 시간/행 수/초당 행 수를 표로 출력하고 DIR(기본값: .profile)에 stages.json, stages.txt로 저장')
+    parser.add_argument('--cprofile', action='store_true',
+                        help='--profile과 함께 사용: 단계마다 cProfile 통계를 DIR/<순번>_<단계명>.prof로 저장')
+    parser.add_argument('--no-cache', action='store_true', help='명세서 파싱 캐시(.statement_cache)를 사용하지 않고 모든 파일을 다시 읽기')
+    args = parser.parse_args(argv)
+
+    # Expedia 다운로드 옵션 처리
+    if args.download_expedia:
+        print("\n" + "="*80)
+        print("Expedia 명세서 다운로드 옵션 활성화")
+        print("="*80)
         try:
-            if expedia_price_col and expedia_price_col in df_expedia.columns:
-                price_str = str(e_row[expedia_price_col])
-            else:
-                price_str = str(e_row.iloc[5])
-            # "KRW 538739" 형식에서 숫자만 추출
-            price_str = re.sub(r'[^\d.]', '', price_str).strip()
-            expedia_price = float(price_str)
-            
-            # 오차 범위 1,000원 이내 허용
-            price_diff = abs(use_price - expedia_price)
-            
-            print(f"    익스피디아가격={expedia_price}, 전체고객목록가격={use_price}, 차이={price_diff}")
-            
-            if price_diff <= 1000:
-                price_match = True
-                matched_expedia_refs[ota_no] = matched_expedia_refs.get(ota_no, 0) + 1
-                print(f"    [OK] 매칭 성공! (오차 {price_diff}원)")
-                break
-            else:
-                if log_info is None:
-                    expedia_file_name = expedia_files[0] if expedia_files else '익스피디아파일'
-                    log_info = [name, ws_row, use_price, expedia_file_name, e_idx+2, str(expedia_price), str(expedia_price)]
+            from expedia_downloader import ExpediaDownloader
+
+            downloader = ExpediaDownloader(base_dir=dir_base)
+            count = downloader.run(
+                start_date=args.expedia_start_date,
+                end_date=args.expedia_end_date
+            )
+
+            print(f"\n[결과] {count}개 Expedia 명세서 다운로드 완료\n")
         except Exception as e:
-            print(f"    오류: {e}")
-            continue
-    
-    if price_match:
-        for cell in ws[ws_row]:
-            cell.fill = fill_yellow
-            cell.font = Font()  # 글씨 색상 초기화 (검정색)
-        print(f"    → 노란색 표시")
-        expedia_matched_count += 1
-    else:
-        if matched_expedia_refs.get(ota_no, 0) > 0:
-            matched_expedia_refs[ota_no] -= 1
-            print(f"    → 이미 매칭됨 (표시 없음)")
-            continue
-        
-        # 기존 배경색 제거 후 빨간색 글씨만 표시
-        for cell in ws[ws_row]:
-            cell.fill = PatternFill(fill_type=None)  # 배경색 초기화
-            cell.font = font_red
-        print(f"    [ERROR] 불일치 - 빨간색 표시 + 비교로그 기록")
-        expedia_mismatch_count += 1
-        
-        if log_info:
-            log_ws.append(log_info)
+            print(f"\n[ERROR] Expedia 다운로드 실패: {e}\n")
+            import traceback
+            traceback.print_exc()
+
+    cache_dir = None if args.no_cache else DEFAULT_CACHE_DIR
+    profiler = StageProfiler(enabled=bool(args.profile), cprofile_dir=args.profile if args.cprofile else None)
+
+    if args.batch is not None:
+        if args.batch:
+            # 결과 파일 이름(매출_검토_결과(N월).xlsx)을 만들 수 있도록 파일명에 YYYYMM이 있어야 함, 같은 달은 하나만
+            lists = {}
+            for p in args.batch:
+                month = month_of(p)
+                if month is None:
+                    parser.error(f'--batch 파일명에 YYYYMM(예: 전체고객 목록_202512.xlsx)이 없습니다: {p}')
+                if month in lists:
+                    parser.error(f'--batch에 같은 달({month}) 파일이 두 개 있습니다: {lists[month]}, {p}')
+                lists[month] = p
         else:
-            log_ws.append([name, ws_row, use_price, '-', '-', '불일치', '-'])
+            lists = find_monthly_lists([dir_base, os.path.join(dir_base, '매출검토결과')])
+        if not lists:
+            raise FileNotFoundError('전체고객 목록_*.xlsx 파일이 없습니다.')
+        # 달마다 작업 프로세스에서 실행되므로 일괄 비교 전체 시간만 기록
+        with profiler.stage('일괄 비교') as st:
+            summary = reconcile_batch(lists, args.batch_output, directory_ota, cache_dir=cache_dir,
+                                      style_mode=args.style_mode, log_output=args.log_output, workers=args.workers,
+                                      incremental=args.incremental)
+            st.rows = sum(n for counts in summary.values() for by_status in counts.values() for n in by_status.values())
+        if args.profile:
+            report_profile(profiler, args.profile)
+        return
+
+    # 결과파일이 없으면 최신 전체고객 목록 파일을 읽어서 결과파일로 저장
+    result_path = os.path.join(dir_base, '매출_검토_결과.xlsx')
+    source_path = result_path
+    if not os.path.exists(result_path):
+        import glob
+        all_list = sorted(glob.glob(os.path.join(dir_base, '전체고객 목록_*.xlsx')))
+        if not all_list:
+            raise FileNotFoundError('전체고객 목록_*.xlsx 파일이 없습니다. 결과파일을 생성할 수 없습니다.')
+        source_path = all_list[-1]
+
+    result = reconcile(source_path, directory_ota, output_path=result_path,
+                       cache_dir=cache_dir, style_mode=args.style_mode,
+                       log_output=args.log_output, parallel=args.parallel, incremental=args.incremental,
+                       diff_only=args.diff_only, profiler=profiler)
+    if args.profile:
+        report_profile(profiler, args.profile)
 
-print(f"\n[완료] 익스피디아 비교 완료")
-print(f"  ✅ 매칭 성공: {expedia_matched_count}건")
-print(f"  ❌ 가격 불일치: {expedia_mismatch_count}건")
-print(f"  🔵 예약번호 없음: {expedia_notfound_count}건")
-print("="*80)
+    # Peter Ludwig 비교로그 출력
+    print_peter_ludwig_log(result)
 
-# 결과 저장
-result_path = os.path.join(dir_base, '매출_검토_결과.xlsx')
-wb.save(result_path)
-print(f'완료: {result_path}에 저장됨')
 
-# Peter Ludwig 비교로그 출력
-print_peter_ludwig_log()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+전체고객 목록 행 ↔ 명세서 행 1:1 배정
+- 같은 예약번호/이름 그룹 안에서 허용 오차 이내로 짝지을 수 있는 행을 최대한 많이 배정 (같은 명세서 행을 두 번 쓰지 않음)
+- 작은 그룹: 정확한 최적 배정 (비트마스크 DP, 배정 수 최대 → 오차 합 최소)
+- 큰 그룹: 오차가 작은 짝부터 힙으로 꺼내 배정 (greedy)
+- 동점이면 항상 앞 행(전체고객 목록 행 순서, 명세서 행 순서)을 우선 → 실행할 때마다 같은 결과
+- 1:1로 안 맞는 나머지는 부분합 매칭: 여러 행의 합 = 여러 명세서 행의 합 (meet-in-the-middle, 크기/시간 제한)
+"""
+
+import heapq
+import time
+
+import numpy as np
+
+NO_EDGE = np.iinfo(np.int64).max
+
+# 정확한 배정을 쓰는 그룹 크기: 작은 쪽 EXACT_MAX_SMALL개 이하, 큰 쪽 EXACT_MAX_LARGE개 이하
+# (계산량: 큰 쪽 × 2^작은 쪽 × 작은 쪽)
+EXACT_MAX_SMALL = 8
+EXACT_MAX_LARGE = 32
+
+
+def amount_diffs(prices, prices_ok, amounts, amounts_ok):
+    """
+    행 × 명세서 행 금액 차이 (각자 여러 금액 후보 중 가장 작은 차이)
+
+    Args:
+        prices, prices_ok: (행 수, 후보 수) 전체고객 목록 금액 (예: 아고다 객실료/합계)
+        amounts, amounts_ok: (명세서 행 수, 금액 컬럼 수) 명세서 금액
+
+    Returns:
+        (행 수, 명세서 행 수) int64, 비교할 금액이 없으면 NO_EDGE
+    """
+    diff = np.abs(prices[:, None, :, None] - amounts[None, :, None, :])
+    ok = prices_ok[:, None, :, None] & amounts_ok[None, :, None, :]
+    return np.where(ok, diff, NO_EDGE).min(axis=(2, 3))
+
+
+def assign(diff, tolerance):
+    """
+    차이 행렬 → 행마다 배정된 명세서 행 번호 (diff의 열 번호, -1=없음)
+
+    허용 오차 이내 짝만 배정. 작은 그룹은 정확한 최적해, 큰 그룹은 greedy
+    """
+    n_rows, n_lines = diff.shape
+    edges = diff <= tolerance
+    if not edges.any():
+        return np.full(n_rows, -1, dtype=np.int64)
+    if min(n_rows, n_lines) <= EXACT_MAX_SMALL and max(n_rows, n_lines) <= EXACT_MAX_LARGE:
+        return _assign_exact(diff, edges)
+    return _assign_greedy(diff, edges)
+
+
+def _assign_greedy(diff, edges):
+    heap = [(int(diff[i, j]), int(i), int(j)) for i, j in zip(*np.nonzero(edges))]
+    heapq.heapify(heap)
+    picked = np.full(diff.shape[0], -1, dtype=np.int64)
+    used = set()
+    while heap:
+        _, i, j = heapq.heappop(heap)
+        if picked[i] < 0 and j not in used:
+            picked[i] = j
+            used.add(j)
+    return picked
+
+
+def _assign_exact(diff, edges):
+    # 작은 쪽을 비트마스크로, 큰 쪽을 하나씩 처리
+    transposed = diff.shape[1] > diff.shape[0]
+    if transposed:
+        diff, edges = diff.T, edges.T
+    n_left = diff.shape[0]
+    options = [[int(j) for j in np.flatnonzero(edges[i])] for i in range(n_left)]
+
+    # 상태: 사용한 오른쪽 마스크 → (배정 수 음수, 오차 합, 짝 목록). 작을수록 좋음
+    states = {0: (0, 0, ())}
+    for i in range(n_left):
+        if not options[i]:
+            continue
+        nxt = dict(states)
+        for mask, (neg_count, cost, pairs) in states.items():
+            for j in options[i]:
+                if mask & (1 << j):
+                    continue
+                cand = (neg_count - 1, cost + int(diff[i, j]), pairs + ((i, j),))
+                key = mask | (1 << j)
+                if key not in nxt or cand < nxt[key]:
+                    nxt[key] = cand
+        states = nxt
+    _, _, pairs = min(states.values())
+
+    n_rows = diff.shape[1] if transposed else n_left
+    picked = np.full(n_rows, -1, dtype=np.int64)
+    for i, j in pairs:
+        if transposed:
+            picked[j] = i
+        else:
+            picked[i] = j
+    return picked
+
+
+def subset_sums(values):
+    """values의 모든 부분집합 합 (인덱스 = 비트마스크)"""
+    sums = np.zeros(1 << len(values), dtype=np.int64)
+    for j, v in enumerate(values):
+        sums[1 << j:1 << (j + 1)] = sums[:1 << j] + v
+    return sums
+
+
+def find_balanced_subset(row_amounts, line_amounts, tolerance=0, deadline=None):
+    """
+    합이 같은(허용 오차 이내) 행 부분집합과 명세서 행 부분집합 하나 찾기 (meet-in-the-middle)
+
+    행 금액은 +, 명세서 금액은 -로 놓고 합이 0인 부분집합을 앞/뒤 절반의 부분합 표로 찾음.
+    양쪽에서 하나 이상씩 포함하고 항목 수가 가장 적은 조합 (같으면 비트마스크가 작은 것)
+
+    Returns:
+        (행 번호 목록, 명세서 행 번호 목록) 또는 None
+    """
+    n_rows = len(row_amounts)
+    items = np.concatenate([np.asarray(row_amounts, dtype=np.int64), -np.asarray(line_amounts, dtype=np.int64)])
+    half = len(items) // 2
+    sums_a = subset_sums(items[:half])
+    sums_b = subset_sums(items[half:])
+    order = np.argsort(sums_b, kind='stable')
+    sorted_b = sums_b[order]
+    lo = np.searchsorted(sorted_b, -sums_a - tolerance, side='left')
+    hi = np.searchsorted(sorted_b, -sums_a + tolerance, side='right')
+
+    row_bits = (1 << n_rows) - 1
+    best = None
+    for mask_a in np.flatnonzero(hi > lo):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        for mask_b in order[lo[mask_a]:hi[mask_a]]:
+            mask = int(mask_a) | (int(mask_b) << half)
+            if not (mask & row_bits) or not (mask >> n_rows):
+                continue
+            cand = (mask.bit_count(), mask)
+            if best is None or cand < best:
+                best = cand
+    if best is None:
+        return None
+    mask = best[1]
+    picked = [k for k in range(len(items)) if mask >> k & 1]
+    return [k for k in picked if k < n_rows], [k - n_rows for k in picked if k >= n_rows]
+
+
+def balanced_subsets(row_amounts, line_amounts, tolerance=0, max_items=20, deadline=None):
+    """
+    find_balanced_subset을 반복해 겹치지 않는 부분합 짝을 모두 찾음
+
+    행 + 명세서 행이 max_items개를 넘는 그룹은 건너뜀 (최악 2^(max_items/2) 제한), deadline(perf_counter) 넘으면 중단
+
+    Returns:
+        [(행 번호 목록, 명세서 행 번호 목록), ...] - 번호는 입력 순서 기준
+    """
+    rows = list(range(len(row_amounts)))
+    lines = list(range(len(line_amounts)))
+    found = []
+    while rows and lines and len(rows) + len(lines) <= max_items:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        hit = find_balanced_subset([row_amounts[r] for r in rows], [line_amounts[j] for j in lines], tolerance, deadline)
+        if hit is None:
+            break
+        sub_rows, sub_lines = [rows[r] for r in hit[0]], [lines[j] for j in hit[1]]
+        found.append((sub_rows, sub_lines))
+        rows = [r for r in rows if r not in sub_rows]
+        lines = [j for j in lines if j not in sub_lines]
+    return found
@@ -0,0 +1,55 @@
+"""
+매칭 결과 저장소 (증분 비교용)
+- 전체고객 목록 파일마다 매칭 그룹(예약번호/고객명)별 입력 fingerprint와 결과(행 상태, 매칭된 명세서 행, 비교로그)를 JSON으로 저장
+- 다음 실행에서 fingerprint가 같은 그룹은 결과를 그대로 쓰고, 바뀐 그룹만 다시 비교
+- 매칭 설정(금액 정책 등)이 바뀌면 저장된 결과 전체를 버림
+"""
+
+import os
+import json
+import hashlib
+
+
+class MatchStateStore:
+    """전체고객 목록 하나의 그룹별 매칭 결과"""
+
+    def __init__(self, state_dir: str, customer_list: str, settings: str):
+        """
+        Args:
+            state_dir: 저장 폴더 (없으면 생성)
+            customer_list: 결과 파일(또는 전체고객 목록) 경로 - 파일마다 따로 저장
+            settings: 매칭 설정 fingerprint (다르면 저장된 결과 무시)
+        """
+        os.makedirs(state_dir, exist_ok=True)
+        name = hashlib.sha1(os.path.abspath(customer_list).encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(state_dir, f'match_state_{name}.json')
+        self.settings = settings
+        self.groups = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('settings') != self.settings:
+            return {}
+        return data.get('groups', {})
+
+    def get(self, ota: str, group: str, fingerprint: str):
+        """fingerprint가 같으면 저장된 {'rows': [...], 'log': [...]} 반환, 아니면 None"""
+        entry = self.groups.get(ota, {}).get(group)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return None
+        return entry
+
+    def replace(self, ota: str, entries: dict):
+        """거래처 하나의 그룹 결과를 통째로 교체 (없어진 그룹은 삭제). entries: {그룹: {'fingerprint', 'rows', 'log'}}"""
+        self.groups[ota] = entries
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'settings': self.settings, 'groups': self.groups}, f, ensure_ascii=False,
+                      default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+        os.replace(tmp_path, self.path)
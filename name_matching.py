@@ -0,0 +1,102 @@
+"""
+고객명 유사 매칭 (아고다 Remittances 이름 ↔ 전체고객 목록 고객명)
+- 정규화 키: 대소문자/공백/기호 제거, 이름 순서 차이는 단어 정렬로 흡수
+- 블로킹: 단어 + 2글자(bigram) 색인으로 후보 몇 개만 골라서 비교 (전체 이름과 비교하지 않음)
+- 점수: 문자열 유사도(0~1), 중간 이름만 다른 경우(한쪽 단어가 다른 쪽에 모두 포함)는 높은 점수
+"""
+
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+
+def normalize(val):
+    if val is None:
+        return ''
+    return re.sub(r'[^a-zA-Z0-9가-힣]', '', str(val)).replace('.0','').strip().lower()
+
+
+def name_tokens(name):
+    """이름 → 정규화된 단어 목록 (공백/쉼표/하이픈 등으로 분리)"""
+    return [t for t in (normalize(part) for part in re.split(r'[\s,/\-_.]+', str(name))) if t]
+
+
+def bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def name_keys(name):
+    """(원래 순서 키, 단어 정렬 키, 단어 집합)"""
+    tokens = name_tokens(name)
+    return ''.join(tokens), ''.join(sorted(tokens)), frozenset(tokens)
+
+
+def name_score(a, b):
+    """name_keys() 두 개의 유사도 (0~1)"""
+    plain_a, sorted_a, tokens_a = a
+    plain_b, sorted_b, tokens_b = b
+    if not plain_a or not plain_b:
+        return 0.0
+    if sorted_a == sorted_b:
+        return 1.0
+    score = max(SequenceMatcher(None, plain_a, plain_b).ratio(),
+                SequenceMatcher(None, sorted_a, sorted_b).ratio())
+    small, large = sorted((tokens_a, tokens_b), key=len)
+    # 중간 이름 유무 차이 (예: 'KIM MIN JUN' / 'KIM JUN')
+    if len(small) >= 2 and small < large:
+        score = max(score, 0.95)
+    return score
+
+
+class NameIndex:
+    """명세서 이름 색인 (블로킹 후 후보만 점수 계산)"""
+
+    MAX_CANDIDATES = 20  # 이름 하나당 점수를 계산할 최대 후보 수
+
+    def __init__(self, names):
+        """
+        Args:
+            names: 명세서 이름(키) 목록
+        """
+        self.names = [n for n in dict.fromkeys(names) if normalize(n) not in ('', 'nan')]
+        self.keys = [name_keys(n) for n in self.names]
+        self.by_token = defaultdict(list)
+        self.by_bigram = defaultdict(list)
+        for i, (_, sorted_key, tokens) in enumerate(self.keys):
+            for t in tokens:
+                self.by_token[t].append(i)
+            for g in bigrams(sorted_key):
+                self.by_bigram[g].append(i)
+
+    def candidates(self, keys):
+        """같은 단어가 있거나 bigram이 절반 이상 겹치는 이름 (겹치는 bigram 많은 순)"""
+        _, sorted_key, tokens = keys
+        grams = bigrams(sorted_key)
+        overlap = Counter()
+        for g in grams:
+            overlap.update(self.by_bigram.get(g, ()))
+        shared_token = {i for t in tokens for i in self.by_token.get(t, ())}
+        need = (len(grams) + 1) // 2
+        picked = [i for i, n in overlap.most_common() if n >= need or i in shared_token]
+        return picked[:self.MAX_CANDIDATES]
+
+    def best(self, name, exclude=()):
+        """
+        가장 비슷한 명세서 이름
+
+        Args:
+            name: 전체고객 목록 고객명
+            exclude: 후보에서 뺄 명세서 이름 (다른 고객과 정확히 일치하는 이름 등)
+
+        Returns:
+            (명세서 이름, 점수) - 후보가 없으면 (None, 0.0)
+        """
+        keys = name_keys(name)
+        best_name, best_score = None, 0.0
+        for i in self.candidates(keys):
+            if self.names[i] in exclude:
+                continue
+            score = name_score(keys, self.keys[i])
+            if score > best_score:
+                best_name, best_score = self.names[i], score
+        return best_name, best_score
@@ -0,0 +1,120 @@
+"""
+단계별 실행 시간 측정 (--profile)
+- 이름 붙인 단계마다 경과 시간, 처리 행 수, 초당 행 수 기록
+- 결과를 JSON과 표(텍스트)로 저장
+- 단계마다 cProfile 통계(.prof)를 따로 저장해 느려진 단계를 바로 찾을 수 있음 (pstats/snakeviz로 열기)
+"""
+
+import os
+import re
+import json
+import time
+import cProfile
+import unicodedata
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+
+@dataclass
+class StageRecord:
+    """단계 하나의 측정 결과"""
+    name: str
+    seconds: float = 0.0
+    rows: Optional[int] = None      # 처리한 행 수 (단계 안에서 정해지면 나중에 채움)
+    prof_path: Optional[str] = None  # cProfile 통계 파일
+
+    @property
+    def rows_per_sec(self):
+        if not self.rows or self.seconds <= 0:
+            return None
+        return self.rows / self.seconds
+
+
+def _width(text):
+    """표시 폭 (한글 등 전각 문자는 2칸)"""
+    return sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+
+
+def _pad(text, width, right=False):
+    """표 정렬용 채우기 (right=True면 오른쪽 정렬)"""
+    fill = ' ' * max(width - _width(text), 0)
+    return fill + text if right else text + fill
+
+
+class StageProfiler:
+    """단계별 시간/행 수 기록기. enabled=False면 아무것도 기록하지 않음"""
+
+    JSON_FILE = 'stages.json'
+    TABLE_FILE = 'stages.txt'
+    PROF_PATTERN = re.compile(r'^\d{2,}_.*\.prof$')  # stage()가 만드는 파일 이름
+
+    def __init__(self, enabled: bool = True, cprofile_dir: Optional[str] = None):
+        """
+        Args:
+            enabled: False면 stage()가 시간만 재지 않고 그대로 통과
+            cprofile_dir: 지정하면 단계마다 cProfile 통계를 '<순번>_<단계명>.prof'로 저장
+                          (이전 실행의 .prof는 시작할 때 지움 - 단계 수가 줄어도 옛 파일이 섞이지 않게)
+        """
+        self.enabled = enabled
+        self.cprofile_dir = cprofile_dir if enabled else None
+        self.records = []
+        if self.cprofile_dir:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            for name in os.listdir(self.cprofile_dir):
+                if self.PROF_PATTERN.match(name):
+                    os.remove(os.path.join(self.cprofile_dir, name))
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None):
+        """
+        with profiler.stage('명세서 읽기') as st:
+            ...
+            st.rows = 처리한 행 수
+        """
+        record = StageRecord(name, rows=rows)
+        if not self.enabled:
+            yield record
+            return
+        profile = cProfile.Profile() if self.cprofile_dir else None
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            record.seconds = time.perf_counter() - start
+            if profile is not None:
+                safe = re.sub(r'[^\w.-]+', '_', name).strip('_')
+                record.prof_path = os.path.join(self.cprofile_dir, f'{len(self.records) + 1:02d}_{safe}.prof')
+                profile.dump_stats(record.prof_path)
+            self.records.append(record)
+
+    def to_dict(self) -> dict:
+        stages = [{**asdict(r), 'rows_per_sec': r.rows_per_sec} for r in self.records]
+        return {'total_seconds': sum(r.seconds for r in self.records), 'stages': stages}
+
+    def table(self) -> str:
+        """사람이 읽는 표 (단계, 시간, 비율, 행 수, 초당 행 수)"""
+        total = sum(r.seconds for r in self.records) or 1.0
+        width = max([_width(r.name) for r in self.records] + [4])
+        lines = [f"{_pad('단계', width)}  {_pad('시간(초)', 9, True)}  {_pad('비율', 6, True)}  "
+                 f"{_pad('행 수', 8, True)}  {_pad('행/초', 10, True)}"]
+        for r in self.records:
+            rows = '' if r.rows is None else f'{r.rows:,}'
+            rate = '' if r.rows_per_sec is None else f'{r.rows_per_sec:,.0f}'
+            lines.append(f'{_pad(r.name, width)}  {r.seconds:>9.3f}  {r.seconds / total:>6.1%}  {rows:>8}  {rate:>10}')
+        lines.append(f"{_pad('합계', width)}  {sum(r.seconds for r in self.records):>9.3f}")
+        return '\n'.join(lines)
+
+    def save(self, output_dir: str):
+        """stages.json + stages.txt 저장, 저장한 JSON 경로 반환"""
+        os.makedirs(output_dir, exist_ok=True)
+        json_path = os.path.join(output_dir, self.JSON_FILE)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        with open(os.path.join(output_dir, self.TABLE_FILE), 'w', encoding='utf-8') as f:
+            f.write(self.table() + '\n')
+        return json_path
@@ -0,0 +1,107 @@
+"""
+OTA 명세서 파싱 결과 캐시
+- 한 번 읽은 Remittances/아고다/부킹/익스피디아 파일을 pickle로 저장
+- 파일 경로 + 크기 + 수정시각 + 내용 해시(SHA-1)로 식별, 바뀐 파일만 다시 파싱
+- 같은 파일을 다른 방식(읽는 컬럼 등)으로 읽으면 variant로 구분해서 따로 저장
+- 원본 파일이 사라진 캐시 항목은 자동 정리
+"""
+
+import os
+import json
+import hashlib
+
+import pandas as pd
+
+
+class StatementCache:
+    """명세서 파싱 결과 디스크 캐시"""
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, cache_dir: str):
+        """
+        Args:
+            cache_dir: 캐시 디렉토리 (없으면 생성)
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        self.index = self._load_index()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _entry_path(self, entry: dict) -> str:
+        return os.path.join(self.cache_dir, entry['cache_file'])
+
+    def load(self, path: str, reader, variant: str = '') -> pd.DataFrame:
+        """
+        캐시에 있으면 캐시에서, 없거나 바뀌었으면 reader(path)로 읽어서 캐시에 저장
+
+        Args:
+            path: 명세서 파일 경로
+            reader: 파일을 DataFrame으로 읽는 함수 (예: pd.read_excel)
+            variant: 읽는 방식 구분자 (reader가 바뀌면 다른 캐시 항목 사용)
+        """
+        source = os.path.abspath(path)
+        key = f'{source}|{variant}' if variant else source
+        stat = os.stat(path)
+        entry = self.index.get(key)
+
+        if entry is not None and os.path.exists(self._entry_path(entry)):
+            same_stat = entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime
+            # 크기/수정시각이 같으면 해시 생략, 수정시각만 바뀌었으면 해시로 재확인
+            if same_stat or (entry['size'] == stat.st_size and entry['sha1'] == self.file_hash(path)):
+                try:
+                    df = pd.read_pickle(self._entry_path(entry))
+                except Exception:
+                    df = None
+                if df is not None:
+                    if not same_stat:
+                        entry['mtime'] = stat.st_mtime
+                        self._save_index()
+                    self.hits += 1
+                    return df
+
+        df = reader(path)
+        self.misses += 1
+        sha1 = self.file_hash(path)
+        cache_file = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.pkl'
+        df.to_pickle(os.path.join(self.cache_dir, cache_file))
+        self.index[key] = {'path': source, 'size': stat.st_size, 'mtime': stat.st_mtime, 'sha1': sha1, 'cache_file': cache_file}
+        self._save_index()
+        return df
+
+    def evict_missing(self) -> int:
+        """원본 파일이 없어진 캐시 항목 삭제, 삭제한 개수 반환"""
+        removed = 0
+        for key in [k for k, entry in self.index.items() if not os.path.exists(entry.get('path', k))]:
+            entry = self.index.pop(key)
+            try:
+                os.remove(self._entry_path(entry))
+            except OSError:
+                pass
+            removed += 1
+        if removed:
+            self._save_index()
+        return removed
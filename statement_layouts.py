@@ -0,0 +1,93 @@
+"""
+OTA 명세서 레이아웃 레지스트리
+- 헤더 행의 해시(fingerprint)로 알려진 명세서 양식을 식별하고 키/금액/이름/날짜 컬럼을 바로 지정
+- 등록되지 않은 헤더는 거래처별 기존 추정 규칙(컬럼 위치/키워드)으로 처리하고 fingerprint를 알려줌
+- 새 양식은 register_layout()으로 추가 (매칭 로직 수정 불필요)
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class StatementLayout:
+    """명세서 양식 하나의 컬럼 구성"""
+    name: str                       # 양식 이름 (로그용)
+    ota: str                        # 거래처 (아고다/부킹닷컴/익스피디아)
+    key: Optional[str]              # 매칭 키 컬럼 (아고다=고객명, 부킹/익스피디아=예약번호)
+    amounts: List[str] = field(default_factory=list)  # 금액 컬럼 (앞쪽부터 우선)
+    guest: Optional[str] = None     # 고객명 컬럼 (있으면)
+    date: Optional[str] = None      # 날짜 컬럼 (있으면)
+    registered: bool = True         # False면 추정 규칙으로 만든 양식
+
+
+def header_fingerprint(header) -> str:
+    """헤더 행 → fingerprint (컬럼명을 순서대로 이어 SHA-1, 앞 12자리)"""
+    joined = '\x1f'.join(str(c).strip() for c in header)
+    return hashlib.sha1(joined.encode('utf-8')).hexdigest()[:12]
+
+
+# fingerprint → StatementLayout
+LAYOUTS: Dict[str, StatementLayout] = {}
+
+
+def register_layout(header, layout: StatementLayout) -> str:
+    """헤더 행으로 양식 등록, fingerprint 반환"""
+    fp = header_fingerprint(header)
+    LAYOUTS[fp] = layout
+    return fp
+
+
+def registry_version() -> str:
+    """등록된 양식 전체의 해시 (양식이 바뀌면 캐시도 다시 읽도록 캐시 키에 사용)"""
+    items = sorted((fp, repr(layout)) for fp, layout in LAYOUTS.items())
+    return hashlib.sha1(repr(items).encode('utf-8')).hexdigest()[:12]
+
+
+# ---- 추정 규칙 (등록되지 않은 헤더용) ----
+
+def guess_agoda(header) -> StatementLayout:
+    # Remittances/아고다 데이터의 이름, 금액 컬럼 추정 (유연 처리)
+    # 이름 컬럼: 기본 4번째(D열), 부족하면 첫 번째 컬럼 사용
+    name_col = header[3] if len(header) >= 4 else (header[0] if header else None)
+    # 금액 컬럼: '금액'/'Amount' 등의 키워드 기반 탐색
+    price_cols = [col for col in header if any(x in str(col) for x in ['금액', 'Amount', 'amount', 'AMOUNT']) or str(col) in ['G', 'H'] or str(col).startswith('Unnamed')]
+    if not price_cols and len(header) >= 8:
+        # G,H 강제 지정은 컬럼이 충분할 때만
+        price_cols = [header[6], header[7]]
+    return StatementLayout('아고다 (추정)', '아고다', name_col, price_cols, guest=name_col, registered=False)
+
+
+def guess_booking(header) -> StatementLayout:
+    # 부킹 데이터 구조: B열=예약번호, I열=가격
+    return StatementLayout('부킹 (추정)', '부킹닷컴', header[1] if len(header) > 1 else None,
+                           [header[8]] if len(header) > 8 else [], registered=False)
+
+
+def guess_expedia(header) -> StatementLayout:
+    # 익스피디아 데이터 구조: A열=예약번호, F열=처리금액
+    return StatementLayout('익스피디아 (추정)', '익스피디아', header[0] if header else None,
+                           [header[5]] if len(header) > 5 else [], registered=False)
+
+
+GUESSERS = {'아고다': guess_agoda, '부킹닷컴': guess_booking, '익스피디아': guess_expedia}
+
+
+def resolve_layout(ota: str, header) -> StatementLayout:
+    """헤더 → 양식. 등록된 양식(같은 거래처)이 있으면 그대로, 없으면 추정 규칙"""
+    layout = LAYOUTS.get(header_fingerprint(header))
+    if layout is not None and layout.ota == ota:
+        return layout
+    return GUESSERS[ota](list(header))
+
+
+# ---- 알려진 양식 ----
+
+# 부킹 Payout 명세서 CSV (extranet > 재무 > 명세서 다운로드)
+register_layout(
+    ['Type', 'Reference number', 'Check-in', 'Checkout', 'Guest name', 'Reservation status',
+     'Currency', 'Payment status', 'Amount', 'Payout date', 'Payout ID'],
+    StatementLayout('부킹 Payout 명세서', '부킹닷컴', 'Reference number', ['Amount'],
+                    guest='Guest name', date='Payout date'),
+)